@@ -1,18 +1,193 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Post, Category, Location, Comment
+from .bulk import bulk_update_comments, bulk_update_posts, log_progress
+from .constants import ADMIN_INLINE_COMMENTS
+from .jobs import enqueue_renditions, queue_stats
+from .models import Post, Category, Location, Comment, ImageJob
+from .search import (
+    COMMENT_FTS_TABLE, POST_FTS_TABLE, fts_available, matching_ids,
+    prefix_q, search_terms
+)
 
 
-class CommentInline(admin.StackedInline):
+User = get_user_model()
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Фильтр по внешнему ключу с полем автодополнения.
+
+    В отличие от RelatedFieldListFilter не выводит все связанные объекты:
+    варианты подгружает виджет автодополнения админки, а для отрисовки
+    читается только выбранный объект.
+    Использование: list_filter = (('post', AutocompleteFilter),)
+    """
+
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        self.lookup_kwarg = (
+            f'{field_path}__{field.target_field.attname}__exact')
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin,
+                         field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(
+                field, model_admin.admin_site,
+                attrs={'style': 'width: 100%'}),
+        )
+
+    @staticmethod
+    def media(field, admin_site) -> forms.Media:
+        return AutocompleteSelect(field, admin_site).media + forms.Media(
+            js=('js/autocomplete_filter.js',))
+
+    def has_output(self) -> bool:
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is not None,
+            'param': self.lookup_kwarg,
+            'clear_url': changelist.get_query_string(
+                remove=[self.lookup_kwarg]),
+            'widget': self.form_field.widget.render(
+                f'filter-{self.field_path}', self.lookup_val),
+        }
+
+
+class CachedChoicesMixin:
+    """Миксин админки: списки вариантов внешних ключей строятся один раз.
+
+    Каждая строка list_editable получает копию поля формы, и без кеша
+    варианты из cached_choice_fields читались бы из базы заново для
+    каждой строки. Поле получает готовый список вариантов, который
+    копируется в формы без запросов.
+    """
+
+    cached_choice_fields = ()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if formfield is not None and (
+                db_field.name in self.cached_choice_fields):
+            cache = request.__dict__.setdefault('_cached_fk_choices', {})
+            key = (self.model._meta.label, db_field.name)
+            if key not in cache:
+                cache[key] = list(formfield.choices)
+            formfield.choices = cache[key]
+        return formfield
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Виджет автодополнения, берущий выбранный объект из preloaded.
+
+    AutocompleteSelect читает выбранный объект из базы, чтобы вывести его
+    название, — в инлайне это запрос на каждую строку. Если объект уже
+    загружен (select_related в queryset инлайна), его кладёт в preloaded
+    PreloadedAutocompleteFormSet.
+    """
+
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = {
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        }
+        if not selected or not self.preloaded or not (
+                selected <= self.preloaded.keys()):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for key in sorted(selected):
+            options.append(self.create_option(
+                name, key,
+                self.choices.field.label_from_instance(self.preloaded[key]),
+                True, len(options)))
+        return [(None, options, 0)]
+
+
+class PreloadedAutocompleteMixin:
+    """Миксин инлайнов: autocomplete_fields без запроса на каждую строку.
+
+    Работает вместе с PreloadedAutocompleteFormSet; связи из
+    autocomplete_fields должны загружаться в get_queryset() через
+    select_related.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (db_field.name in self.get_autocomplete_fields(request)
+                and 'widget' not in kwargs):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class PreloadedAutocompleteFormSet(BaseInlineFormSet):
+    """Передаёт виджетам автодополнения уже загруженные связи строк."""
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for field in form.fields.values():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if (isinstance(widget, PreloadedAutocompleteSelect)
+                    and widget.field.is_cached(form.instance)):
+                related = widget.field.get_cached_value(form.instance)
+                if related is not None:
+                    widget.preloaded = {str(related.pk): related}
+        return form
+
+
+class MoveToCategoryForm(forms.Form):
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.all(), label='Новая категория')
+
+
+class LatestCommentsFormSet(PreloadedAutocompleteFormSet):
+    """Формы только для ADMIN_INLINE_COMMENTS последних комментариев."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_latest'):
+            self._latest = super().get_queryset()[:ADMIN_INLINE_COMMENTS]
+        return self._latest
+
+
+class CommentInline(PreloadedAutocompleteMixin, admin.StackedInline):
     model = Comment
+    formset = LatestCommentsFormSet
+    verbose_name_plural = (
+        f'Последние комментарии (до {ADMIN_INLINE_COMMENTS})')
     extra = 1
+    autocomplete_fields = ('author',)
     fields = ('author', 'text', 'created_at')
     readonly_fields = ('created_at',)
     can_delete = True
+    show_change_link = True
+
+    def get_queryset(self, request):
+        # Заголовок формы — str(comment) с автором и постом.
+        return super().get_queryset(request).select_related(
+            'author', 'post')
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(CachedChoicesMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'pub_date',
@@ -26,16 +201,154 @@ class PostAdmin(admin.ModelAdmin):
         'location'
     )
     search_fields = ('title',)
+    show_full_result_count = False
     list_filter = ('is_published', 'category')
     list_display_links = ('title',)
+    list_select_related = ('category', 'location')
+    cached_choice_fields = ('category', 'location')
+    readonly_fields = (
+        'comment_count', 'published_comment_count', 'all_comments')
     inlines = [CommentInline]
+    actions = ('publish', 'unpublish', 'move_to_category')
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, obj):
+        if obj.pk is None:
+            return '—'
+        url = reverse('admin:blog_comment_changelist')
+        return format_html(
+            '<a href="{}?post__id__exact={}">Открыть список ({})</a>',
+            url, obj.pk, obj.comment_count)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not fts_available() or not search_term.strip():
+            return super().get_search_results(
+                request, queryset, search_term)
+        if not search_terms(search_term):
+            return queryset.none(), False
+        return queryset.filter(
+            pk__in=matching_ids(POST_FTS_TABLE, search_term)), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            enqueue_renditions(obj)
+
+    @admin.action(description='Опубликовать выбранные публикации')
+    def publish(self, request, queryset):
+        updated = bulk_update_posts(
+            queryset, {'is_published': True},
+            progress=log_progress('Публикация постов'))
+        self.message_user(request, f'Опубликовано постов: {updated}.')
+
+    @admin.action(description='Снять с публикации выбранные публикации')
+    def unpublish(self, request, queryset):
+        updated = bulk_update_posts(
+            queryset, {'is_published': False},
+            progress=log_progress('Снятие постов с публикации'))
+        self.message_user(request, f'Снято с публикации постов: {updated}.')
+
+    @admin.action(description='Перенести в другую категорию')
+    def move_to_category(self, request, queryset):
+        form = MoveToCategoryForm(
+            request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            category = form.cleaned_data['category']
+            updated = bulk_update_posts(
+                queryset, {'category': category},
+                progress=log_progress(f'Перенос постов в «{category}»'))
+            self.message_user(
+                request, f'Перенесено в «{category}» постов: {updated}.')
+            return None
+        return TemplateResponse(
+            request, 'admin/blog/post/move_to_category.html', {
+                **self.admin_site.each_context(request),
+                'title': 'Перенос публикаций в другую категорию',
+                'opts': self.model._meta,
+                'form': form,
+                'count': queryset.count(),
+                'action_checkbox_name': ACTION_CHECKBOX_NAME,
+                'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across', '0'),
+            })
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'text', 'created_at')
-    list_filter = ('post', 'author')
+    list_filter = (
+        ('post', AutocompleteFilter),
+        ('author', AutocompleteFilter),
+    )
+    list_select_related = ('post', 'author')
     search_fields = ('text', 'author__username')
+    show_full_result_count = False
+    actions = ('publish', 'unpublish')
+
+    @admin.action(description='Опубликовать выбранные комментарии')
+    def publish(self, request, queryset):
+        updated = bulk_update_comments(
+            queryset, {'is_published': True},
+            progress=log_progress('Публикация комментариев'))
+        self.message_user(
+            request, f'Опубликовано комментариев: {updated}.')
+
+    @admin.action(description='Скрыть выбранные комментарии')
+    def unpublish(self, request, queryset):
+        updated = bulk_update_comments(
+            queryset, {'is_published': False},
+            progress=log_progress('Скрытие комментариев'))
+        self.message_user(request, f'Скрыто комментариев: {updated}.')
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not fts_available() or not search_term:
+            return super().get_search_results(
+                request, queryset, search_term)
+        # Имя автора ищется по префиксу через уникальный индекс username,
+        # слова комментария — через индекс FTS5.
+        condition = Q(author__in=User.objects.filter(
+            prefix_q('username', search_term)).values('pk'))
+        if search_terms(search_term):
+            condition |= Q(
+                pk__in=matching_ids(COMMENT_FTS_TABLE, search_term))
+        return queryset.filter(condition), False
+
+    @property
+    def media(self):
+        return super().media + AutocompleteFilter.media(
+            Comment._meta.get_field('post'), self.admin_site)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image_name', 'post', 'status', 'attempts', 'duration',
+        'created_at', 'finished_at'
+    )
+    list_filter = ('status',)
+    list_select_related = ('post',)
+    readonly_fields = (
+        'post', 'image_name', 'attempts', 'error', 'created_at',
+        'started_at', 'finished_at', 'duration'
+    )
+    fields = ('status',) + readonly_fields
+    actions = ('requeue',)
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        stats = queue_stats()
+        extra_context['title'] = (
+            f'{self.model._meta.verbose_name_plural}: в очереди '
+            f'{stats["depth"][ImageJob.PENDING]}, выполняется '
+            f'{stats["depth"][ImageJob.RUNNING]}, в среднем '
+            f'{stats["avg_duration"] * 1000:.0f} мс на задание'
+        )
+        return super().changelist_view(request, extra_context)
+
+    @admin.action(description='Вернуть в очередь')
+    def requeue(self, request, queryset):
+        queryset.update(status=ImageJob.PENDING, attempts=0, error='')
 
 
 admin.site.register(Category)
@@ -0,0 +1,92 @@
+import logging
+from typing import Callable, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from blog.cache import bump_generations
+from blog.constants import BULK_CHUNK_SIZE
+from blog.counters import recount_comment_counters
+from blog.models import Comment, Post
+from blog.signals import post_page_scopes
+
+logger = logging.getLogger(__name__)
+
+Progress = Callable[[int, int], None]
+
+
+def chunked_ids(queryset: QuerySet,
+                chunk_size: int = BULK_CHUNK_SIZE) -> Iterator[List[int]]:
+    """Отдаёт id строк queryset порциями по возрастанию id.
+
+    Следующая порция читается с условием pk > последнего id, поэтому
+    обновление уже пройденных строк не сдвигает выборку.
+    """
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk)
+        ids = list(chunk[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+def log_progress(label: str) -> Progress:
+    def report(done: int, total: int) -> None:
+        logger.info('%s: %d из %d', label, done, total)
+    return report
+
+
+def _run_chunks(queryset: QuerySet,
+                apply: Callable[[List[int]], List[str]],
+                chunk_size: int, progress: Optional[Progress]) -> int:
+    total = queryset.count()
+    done = 0
+    for ids in chunked_ids(queryset, chunk_size):
+        with transaction.atomic():
+            scopes = apply(ids)
+        bump_generations(scopes)
+        done += len(ids)
+        if progress is not None:
+            progress(done, total)
+    return done
+
+
+def bulk_update_posts(queryset: QuerySet, values: dict,
+                      chunk_size: int = BULK_CHUNK_SIZE,
+                      progress: Optional[Progress] = None) -> int:
+    """Обновляет посты порциями через QuerySet.update().
+
+    Каждая порция — отдельная транзакция. Сигналы моделей при update()
+    не отправляются, поэтому страницы, где посты были видны до и после
+    изменения, сбрасываются здесь же — одним обращением к кешу на порцию.
+    Строки, уже имеющие нужные значения, пропускаются.
+    """
+    def apply(ids):
+        scopes = post_page_scopes(ids)
+        Post.objects.filter(pk__in=ids).update(
+            updated_at=timezone.now(), **values)
+        return scopes + post_page_scopes(ids)
+
+    return _run_chunks(
+        queryset.exclude(**values), apply, chunk_size, progress)
+
+
+def bulk_update_comments(queryset: QuerySet, values: dict,
+                         chunk_size: int = BULK_CHUNK_SIZE,
+                         progress: Optional[Progress] = None) -> int:
+    """Обновляет комментарии порциями и пересчитывает счётчики постов."""
+    def apply(ids):
+        post_ids = set(Comment.objects.filter(pk__in=ids).values_list(
+            'post_id', flat=True))
+        Comment.objects.filter(pk__in=ids).update(
+            updated_at=timezone.now(), **values)
+        recount_comment_counters(post_ids)
+        return post_page_scopes(post_ids)
+
+    return _run_chunks(
+        queryset.exclude(**values), apply, chunk_size, progress)
@@ -0,0 +1,208 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpRequest, HttpResponse
+from django.utils.http import parse_http_date_safe
+
+from blog.constants import PAGE_CACHE_TIMEOUT
+
+GENERATION_PREFIX = 'blog:gen:'
+MODIFIED_PREFIX = 'blog:modified:'
+PAGE_PREFIX = 'blog:page:'
+STATS_PREFIX = 'blog:stats:'
+
+# Меняется при правке категорий и местоположений: они видны на всех
+# страницах, поэтому такие правки сбрасывают весь кеш страниц.
+GLOBAL_SCOPE = 'global'
+FEED_SCOPE = 'feed'
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def post_scope(post_id) -> str:
+    return f'post:{post_id}'
+
+
+def category_scope(slug: str) -> str:
+    return f'category:{slug}'
+
+
+def author_scope(username: str) -> str:
+    return f'author:{username}'
+
+
+def _initial_generation() -> int:
+    # Начинаем не с нуля: если счётчик вытеснен из кеша, новое значение
+    # не совпадёт ни с одним из уже выданных.
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes: Iterable[str]) -> Dict[str, int]:
+    """Возвращает текущие поколения областей кеша."""
+    keys = {GENERATION_PREFIX + scope: scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _initial_generation(), timeout=None)
+        found[key] = cache.get(key)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def bump_generations(scopes: Iterable[str]) -> None:
+    """Инвалидирует страницы, зависящие от указанных областей."""
+    scopes = set(scopes)
+    for scope in scopes:
+        key = GENERATION_PREFIX + scope
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), timeout=None)
+    now = time.time()
+    cache.set_many(
+        {MODIFIED_PREFIX + scope: now for scope in scopes}, timeout=None)
+
+
+def scopes_validator(scopes: Iterable[str]) -> Dict[str, object]:
+    """Валидатор условного GET по областям кеша, без запросов к базе.
+
+    Поколения областей дают ETag, время их последнего изменения —
+    Last-Modified. Если время вытеснено из кеша, считается, что область
+    изменилась сейчас: лишний ответ 200 безопаснее устаревшего 304.
+    """
+    scopes = tuple(scopes)
+    validator: Dict[str, object] = {
+        f'gen:{scope}': generation
+        for scope, generation in get_generations(scopes).items()
+    }
+    keys = {MODIFIED_PREFIX + scope: scope for scope in scopes}
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys.keys() - found.keys():
+        cache.add(key, now, timeout=None)
+        found[key] = cache.get(key, now)
+    validator['modified'] = datetime.fromtimestamp(
+        max(found.values()), tz=timezone.utc)
+    return validator
+
+
+def record_stat(name: str, delta: int = 1) -> None:
+    key = STATS_PREFIX + name
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def get_stats(names: Iterable[str]) -> Dict[str, int]:
+    keys = {STATS_PREFIX + name: name for name in names}
+    found = cache.get_many(keys)
+    return {name: found.get(key, 0) for key, name in keys.items()}
+
+
+def record_render_time(request: Optional[HttpRequest], name: str,
+                       seconds: float) -> None:
+    """Учитывает время отрисовки фрагмента шаблона.
+
+    В рамках запроса замеры копятся на объекте запроса и сбрасываются в
+    кеш одним пакетом в flush_render_timings().
+    """
+    microseconds = int(seconds * 1_000_000)
+    if request is None:
+        record_stat(f'render:{name}:count')
+        record_stat(f'render:{name}:us', microseconds)
+        return
+    timings = request.__dict__.setdefault('_render_timings', {})
+    count, total = timings.get(name, (0, 0))
+    timings[name] = (count + 1, total + microseconds)
+
+
+def flush_render_timings(request: HttpRequest) -> None:
+    for name, (count, total) in request.__dict__.pop(
+            '_render_timings', {}).items():
+        record_stat(f'render:{name}:count', count)
+        record_stat(f'render:{name}:us', total)
+
+
+def get_render_stats(name: str) -> Dict[str, float]:
+    stats = get_stats((f'render:{name}:count', f'render:{name}:us'))
+    count = stats[f'render:{name}:count']
+    total = stats[f'render:{name}:us']
+    return {
+        'count': count,
+        'total_ms': total / 1000,
+        'avg_ms': total / count / 1000 if count else 0,
+    }
+
+
+def card_fragment_key(post) -> str:
+    """Ключ фрагмента карточки из includes/post_card.html."""
+    return make_template_fragment_key(
+        'post_card', [post.pk, post.card_version])
+
+
+def stamp_card_versions(posts, populate: bool = True) -> None:
+    """Проставляет постам card_version для кеша фрагмента карточки.
+
+    Версия складывается из поколения поста (правки поста и его
+    комментариев) и глобального поколения (категории, местоположения);
+    все поколения страницы читаются одним запросом к кешу.
+
+    populate=False — посты прочитаны из реплики и могут отставать от
+    поколений: такие карточки берутся из кеша, если они там уже есть,
+    а остальные рисуются без сохранения (card_version = None).
+    """
+    generations = get_generations(
+        [GLOBAL_SCOPE] + [post_scope(post.pk) for post in posts])
+    for post in posts:
+        post.card_version = (
+            f'{generations[GLOBAL_SCOPE]}.'
+            f'{generations[post_scope(post.pk)]}')
+    if populate:
+        return
+    cached = cache.get_many([card_fragment_key(post) for post in posts])
+    for post in posts:
+        if card_fragment_key(post) not in cached:
+            post.card_version = None
+
+
+def page_cache_key(request: HttpRequest, scopes: Tuple[str, ...]) -> str:
+    generations = get_generations(scopes)
+    fingerprint = '|'.join(
+        [request.get_full_path()]
+        + [f'{scope}={generations[scope]}' for scope in scopes]
+    )
+    return PAGE_PREFIX + hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def get_cached_page(key: str) -> Optional[HttpResponse]:
+    cached = cache.get(key)
+    if cached is None:
+        record_stat('page_miss')
+        return None
+    record_stat('page_hit')
+    content, headers = cached
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    response.last_modified = (
+        parse_http_date_safe(headers['Last-Modified'])
+        if 'Last-Modified' in headers else None)
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def cache_page_response(key: str, response: HttpResponse) -> HttpResponse:
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    if response.status_code == 200 and not response.cookies:
+        headers = {
+            header: response[header] for header in CACHED_HEADERS
+            if response.has_header(header)
+        }
+        cache.set(key, (response.content, headers), PAGE_CACHE_TIMEOUT)
+    response['X-Page-Cache'] = 'MISS'
+    return response
@@ -3,3 +3,39 @@ MAX_LENGTH = 256
 MAX_LENGTH_SLUG = 64
 
 PAGINATE_BY = 10
+
+COMMENTS_PAGINATE_BY = 20
+
+EXCERPT_WORDS = 10
+
+CURSOR_PAGINATION_DEPTH = 5
+
+PAGE_CACHE_TIMEOUT = 60
+
+# Ширина в CSS-пикселях для каждого вида уменьшенной копии изображения.
+IMAGE_RENDITION_WIDTHS = {'card': 400, 'detail': 640}
+
+IMAGE_DENSITIES = (1, 2)
+
+IMAGE_WEBP_QUALITY = 80
+
+IMAGE_FALLBACK_QUALITY = 82
+
+IMAGE_JOB_MAX_ATTEMPTS = 3
+
+# Через сколько секунд выполняющееся задание считается брошенным
+# (упавшим вместе с обработчиком) и возвращается в очередь.
+IMAGE_JOB_STALE_AFTER = 600
+
+# Файлы моложе этого срока gc_media не трогает: ссылка на только что
+# загруженный файл может быть ещё не сохранена в базе.
+MEDIA_GC_GRACE_HOURS = 24
+
+SEARCH_MAX_TERMS = 8
+
+# Сколько последних комментариев редактируется на странице поста в
+# админке; остальные доступны в списке комментариев.
+ADMIN_INLINE_COMMENTS = 20
+
+# Размер порции (и транзакции) массовых действий в админке.
+BULK_CHUNK_SIZE = 500
@@ -0,0 +1,87 @@
+from collections import Counter
+from typing import Dict, Iterable, Tuple
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from blog.models import Comment, Post
+
+
+CounterDeltas = Dict[int, Tuple[int, int]]
+
+
+def change_comment_counters(deltas: CounterDeltas) -> None:
+    """Атомарно сдвигает счётчики комментариев у постов.
+
+    deltas: {post_id: (изменение comment_count,
+                       изменение published_comment_count)}.
+    Счётчики не опускаются ниже нуля: если они уже разошлись с реальностью
+    (bulk_create, loaddata, update()), удаление комментария не должно
+    падать на ограничении поля. Расхождение исправляет reconcile_counters.
+    """
+    for post_id, (total, published) in deltas.items():
+        if not (total or published):
+            continue
+        Post.objects.filter(pk=post_id).update(
+            comment_count=Greatest(F('comment_count') + total, 0),
+            published_comment_count=Greatest(
+                F('published_comment_count') + published, 0),
+        )
+
+
+def comment_counter_deltas(before, after) -> CounterDeltas:
+    """Считает сдвиги счётчиков при переходе комментария между состояниями.
+
+    Состояние — пара (post_id, is_published) или None, если комментарий
+    не существует.
+    """
+    deltas = Counter()
+    published = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None or state[0] is None:
+            continue
+        post_id, is_published = state
+        deltas[post_id] += sign
+        published[post_id] += sign * bool(is_published)
+    return {
+        post_id: (deltas[post_id], published[post_id])
+        for post_id in deltas.keys() | published.keys()
+    }
+
+
+def _comment_count_subquery(**filters) -> Coalesce:
+    comments = Comment.objects.filter(
+        post=OuterRef('pk'), **filters
+    ).order_by().values('post').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(comments, output_field=IntegerField()), 0)
+
+
+def actual_comment_counts() -> dict:
+    """Выражения для подсчёта реального числа комментариев поста."""
+    return {
+        'comment_count': _comment_count_subquery(),
+        'published_comment_count': _comment_count_subquery(
+            is_published=True),
+    }
+
+
+def recount_comment_counters(post_ids: Iterable[int]) -> int:
+    """Пересчитывает счётчики указанных постов, возвращает число исправленных.
+
+    Обновляются только посты, у которых счётчики разошлись с реальным
+    числом комментариев.
+    """
+    actual = {
+        f'actual_{name}': expression
+        for name, expression in actual_comment_counts().items()
+    }
+    drifted = list(
+        Post.objects.filter(pk__in=post_ids).order_by().annotate(**actual)
+        .filter(
+            ~Q(comment_count=F('actual_comment_count'))
+            | ~Q(published_comment_count=F('actual_published_comment_count'))
+        ).values_list('pk', flat=True)
+    )
+    if drifted:
+        Post.objects.filter(pk__in=drifted).update(**actual_comment_counts())
+    return len(drifted)
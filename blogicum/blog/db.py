@@ -0,0 +1,53 @@
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_NAMES = frozenset((
+    'journal_mode', 'synchronous', 'busy_timeout', 'mmap_size',
+    'cache_size', 'temp_store',
+))
+
+PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def pragma_statements(pragmas: dict) -> list:
+    """PRAGMA-запросы для настроек; значения приходят из окружения."""
+    statements = []
+    for name, value in pragmas.items():
+        if name not in PRAGMA_NAMES or not PRAGMA_VALUE_RE.match(str(value)):
+            raise ImproperlyConfigured(
+                f'Недопустимая настройка SQLite: {name}={value!r}.')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(connection, pragmas: dict) -> None:
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor == 'sqlite' and settings.SQLITE_PRAGMAS:
+        apply_pragmas(connection, settings.SQLITE_PRAGMAS)
+
+
+def close_connections_before_fork() -> None:
+    """Закрывает соединения с базой перед отправкой задач в пул процессов.
+
+    ProcessPoolExecutor запускает процессы лениво, при submit(), а выборки
+    между отправками снова открывают соединение, поэтому закрывать его
+    нужно перед каждой отправкой: иначе дочерний процесс унаследует
+    открытый дескриптор SQLite или сокет PostgreSQL. Соединение внутри
+    atomic() не закрывается — это откатило бы транзакцию; так вызываются
+    команды только из тестов.
+    """
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
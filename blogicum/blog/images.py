@@ -0,0 +1,147 @@
+import posixpath
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+from PIL import Image, ImageOps
+
+from blog.constants import (
+    IMAGE_DENSITIES, IMAGE_FALLBACK_QUALITY, IMAGE_RENDITION_WIDTHS,
+    IMAGE_WEBP_QUALITY
+)
+from blog.models import PostFile
+
+WEBP = 'webp'
+JPEG = 'jpg'
+PNG = 'png'
+
+
+def rendition_name(name: str, rendition: str, width: int,
+                   extension: str) -> str:
+    """Имя, под которым копия передаётся хранилищу.
+
+    post_images/photo.jpg -> post_images/photo.card-800w.webp
+
+    HashedFileSystemStorage оставляет от него только каталог и расширение
+    и сохраняет копию как post_images/<sha256 содержимого>.webp, поэтому
+    одинаковые копии хранятся одним файлом, а повторная генерация не
+    плодит дубликатов. Итоговые имена берутся из результата save().
+    """
+    stem, _ = posixpath.splitext(name)
+    return f'{stem}.{rendition}-{width}w.{extension}'
+
+
+def _target_widths(base_width: int, original_width: int) -> List[int]:
+    # Не увеличиваем картинку: ширины больше оригинала сводятся к нему.
+    widths = []
+    for density in IMAGE_DENSITIES:
+        width = min(base_width * density, original_width)
+        if width not in widths:
+            widths.append(width)
+    return widths
+
+
+def _encode(image: Image.Image, extension: str) -> bytes:
+    buffer = BytesIO()
+    if extension == WEBP:
+        image.save(buffer, 'WEBP', quality=IMAGE_WEBP_QUALITY, method=4)
+    elif extension == PNG:
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'JPEG', quality=IMAGE_FALLBACK_QUALITY,
+                   optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_renditions(name: str,
+                        storage: Optional[Storage] = None) -> Dict:
+    """Создаёт уменьшенные копии изображения и возвращает их описание.
+
+    Для каждого вида из IMAGE_RENDITION_WIDTHS сохраняются копии в WebP и
+    в формате-заглушке (JPEG, либо PNG для картинок с прозрачностью) для
+    каждой плотности из IMAGE_DENSITIES. EXIF при перекодировании
+    отбрасывается, ориентация применяется к пикселям.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as file:
+        with Image.open(file) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    fallback = PNG if has_alpha else JPEG
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    renditions = {
+        'source': name,
+        'width': image.width,
+        'height': image.height,
+    }
+    for rendition, base_width in IMAGE_RENDITION_WIDTHS.items():
+        sources = {WEBP: [], fallback: []}
+        for width in _target_widths(base_width, image.width):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for extension, files in sources.items():
+                files.append([
+                    storage.save(
+                        rendition_name(name, rendition, width, extension),
+                        ContentFile(_encode(resized, extension))),
+                    width,
+                ])
+        width = sources[fallback][0][1]
+        renditions[rendition] = {
+            'width': width,
+            'height': max(1, round(image.height * width / image.width)),
+            'webp': sources[WEBP],
+            'fallback': sources[fallback],
+        }
+    return renditions
+
+
+def rendition_files(renditions: dict):
+    for rendition in renditions.values():
+        if isinstance(rendition, dict):
+            for name, _ in rendition.get('webp', []) + rendition.get(
+                    'fallback', []):
+                yield name
+
+
+def post_file_names(post) -> Set[str]:
+    """Файлы поста: изображение и все его копии."""
+    names = set(rendition_files(post.image_renditions or {}))
+    if post.image:
+        names.add(post.image.name)
+    return names
+
+
+def sync_post_files(posts: Iterable, created: bool = False) -> None:
+    """Приводит записи PostFile постов в соответствие с их файлами.
+
+    У только что созданных постов записей ещё нет, и их не читают.
+    """
+    posts = list(posts)
+    wanted = {
+        (post.pk, name) for post in posts for name in post_file_names(post)}
+    stale = []
+    if not created:
+        for pk, post_id, name in PostFile.objects.filter(
+                post__in=[post.pk for post in posts]).values_list(
+                    'pk', 'post_id', 'name'):
+            if (post_id, name) in wanted:
+                wanted.discard((post_id, name))
+            else:
+                stale.append(pk)
+    if stale:
+        PostFile.objects.filter(pk__in=stale).delete()
+    if wanted:
+        PostFile.objects.bulk_create(
+            [PostFile(post_id=post_id, name=name)
+             for post_id, name in wanted],
+            ignore_conflicts=True)
+
+
+def renditions_are_current(post) -> bool:
+    renditions = post.image_renditions or {}
+    return bool(post.image) and renditions.get('source') == post.image.name
@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from blog.constants import IMAGE_JOB_MAX_ATTEMPTS, IMAGE_JOB_STALE_AFTER
+from blog.images import generate_renditions
+from blog.models import ImageJob, Post
+
+
+def enqueue_renditions(post: Post) -> None:
+    """Ставит в очередь создание копий нового изображения поста.
+
+    Ещё не начатые задания по прежнему изображению больше не нужны.
+    Пока копий нет, шаблоны показывают оригинал.
+    """
+    ImageJob.objects.filter(post=post, status=ImageJob.PENDING).delete()
+    if post.image:
+        ImageJob.objects.create(post=post, image_name=post.image.name)
+    elif post.image_renditions:
+        post.image_renditions = {}
+        post.save(update_fields=['image_renditions', 'updated_at'])
+
+
+def requeue_stale_jobs() -> int:
+    """Возвращает в очередь задания, брошенные упавшим обработчиком."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=IMAGE_JOB_STALE_AFTER),
+    ).update(status=ImageJob.PENDING)
+
+
+def claim_jobs(limit: int) -> List[ImageJob]:
+    """Забирает из очереди до limit заданий и помечает их выполняемыми.
+
+    Там, где база умеет SKIP LOCKED, несколько обработчиков не мешают
+    друг другу; иначе повторный захват отсекается условием на статус.
+    """
+    with transaction.atomic():
+        pending = ImageJob.objects.filter(
+            status=ImageJob.PENDING).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        ids = list(pending.values_list('pk', flat=True)[:limit])
+        ImageJob.objects.filter(
+            pk__in=ids, status=ImageJob.PENDING
+        ).update(status=ImageJob.RUNNING, started_at=timezone.now(),
+                 attempts=F('attempts') + 1)
+    return list(ImageJob.objects.filter(
+        pk__in=ids, status=ImageJob.RUNNING).order_by('created_at'))
+
+
+def process_image(name: str) -> Tuple[Dict, float]:
+    """Выполняется в дочернем процессе: копии и время их создания."""
+    started = time.perf_counter()
+    renditions = generate_renditions(name)
+    return renditions, time.perf_counter() - started
+
+
+def complete_job(job: ImageJob, renditions: Dict, duration: float) -> None:
+    # Изображение могли заменить, пока задание выполнялось: тогда копии
+    # уже не нужны, а новое изображение обработает своё задание.
+    post = Post.objects.filter(
+        pk=job.post_id, image=job.image_name).only('pk', 'image').first()
+    if post is not None:
+        # updated_at входит в валидатор страницы поста: без него ETag не
+        # изменится и читатели так и останутся с оригиналом.
+        post.image_renditions = renditions
+        post.save(update_fields=['image_renditions', 'updated_at'])
+    job.status = ImageJob.DONE
+    job.error = ''
+    job.duration = duration
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'duration', 'finished_at'])
+
+
+def fail_job(job: ImageJob, error: BaseException) -> None:
+    job.status = (
+        ImageJob.FAILED if job.attempts >= IMAGE_JOB_MAX_ATTEMPTS
+        else ImageJob.PENDING)
+    job.error = f'{type(error).__name__}: {error}'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def queue_stats() -> Dict:
+    """Глубина очереди по статусам и время обработки заданий."""
+    depth = dict.fromkeys(
+        (status for status, _ in ImageJob.STATUS_CHOICES), 0)
+    depth.update(ImageJob.objects.order_by().values_list(
+        'status').annotate(Count('pk')))
+    timings = ImageJob.objects.filter(status=ImageJob.DONE).aggregate(
+        avg=Avg('duration'), max=Max('duration'))
+    oldest = ImageJob.objects.filter(status=ImageJob.PENDING).order_by(
+        'created_at').values_list('created_at', flat=True).first()
+    return {
+        'depth': depth,
+        'avg_duration': timings['avg'] or 0,
+        'max_duration': timings['max'] or 0,
+        'oldest_pending_age': (
+            (timezone.now() - oldest).total_seconds() if oldest else 0),
+    }
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import GLOBAL_SCOPE, bump_generations
+from blog.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет краткое содержание постов. Посты читаются и '
+        'обновляются порциями по возрастанию id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Количество постов в одной порции.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать и уже заполненные краткие содержания.')
+
+    def handle(self, *args, chunk_size, **options):
+        queryset = Post.objects.only('pk', 'text').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(excerpt='').exclude(text='')
+        last_pk = 0
+        updated = 0
+        while True:
+            posts = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+            if not posts:
+                break
+            for post in posts:
+                post.excerpt = make_excerpt(post.text)
+            with transaction.atomic():
+                Post.objects.bulk_update(posts, ['excerpt'])
+            last_pk = posts[-1].pk
+            updated += len(posts)
+        if updated:
+            # bulk_update не отправляет сигналы: сбрасываем кеш карточек.
+            bump_generations([GLOBAL_SCOPE])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено кратких содержаний: {updated}.'))
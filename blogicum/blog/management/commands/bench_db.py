@@ -0,0 +1,178 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from blog.db import apply_pragmas
+
+BENCH_ALIAS = 'bench'
+
+# 'stock' явно возвращает журнал отката: режим WAL сохраняется в файле
+# базы и иначе перешёл бы из предыдущего прогона.
+PROFILES = {
+    'stock': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'production': settings.SQLITE_PRODUCTION_PRAGMAS,
+}
+
+FEED_SQL = (
+    'SELECT id, title, excerpt, pub_date, comment_count FROM blog_post '
+    'WHERE is_published AND pub_date <= %s ORDER BY pub_date DESC LIMIT 10'
+)
+COMMENT_SQL = (
+    'INSERT INTO blog_comment (is_published, created_at, updated_at, '
+    'post_id, author_id, text) VALUES (1, %s, %s, %s, 1, %s)'
+)
+COUNTER_SQL = (
+    'UPDATE blog_post SET comment_count = comment_count + 1, '
+    'published_comment_count = published_comment_count + 1 WHERE id = %s'
+)
+
+
+class Worker(threading.Thread):
+    """Поток с собственным соединением: читает ленту или пишет комментарии.
+
+    Запись повторяет то, что делает CommentCreateView: вставка
+    комментария и обновление счётчиков поста в одной транзакции.
+    """
+
+    def __init__(self, writer: bool, posts: int, deadline: float):
+        super().__init__(daemon=True)
+        self.writer = writer
+        self.posts = posts
+        self.deadline = deadline
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        connection = connections[BENCH_ALIAS]
+        try:
+            while time.perf_counter() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    self.operation(connection)
+                except OperationalError:
+                    self.errors += 1
+                    continue
+                self.latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    def operation(self, connection):
+        now = timezone.now()
+        if not self.writer:
+            with connection.cursor() as cursor:
+                cursor.execute(FEED_SQL, [now])
+                cursor.fetchall()
+            return
+        post_id = random.randint(1, self.posts)
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute(COMMENT_SQL, [now, now, post_id, 'Тест'])
+                cursor.execute(COUNTER_SQL, [post_id])
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при смешанной нагрузке '
+        '(чтение ленты и запись комментариев) с настройками по умолчанию '
+        'и с профилем production. Работает на временной копии схемы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument(
+            '--profile', choices=('stock', 'production', 'both'),
+            default='both')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Бенчмарк предназначен для SQLite.')
+        profiles = (
+            PROFILES if options['profile'] == 'both'
+            else {options['profile']: PROFILES[options['profile']]})
+        with tempfile.TemporaryDirectory() as directory:
+            self.create_database(os.path.join(directory, 'bench.sqlite3'),
+                                 options['posts'])
+            try:
+                for name, pragmas in profiles.items():
+                    self.run_profile(name, pragmas, options)
+            finally:
+                connections[BENCH_ALIAS].close()
+                del connections.databases[BENCH_ALIAS]
+
+    def create_database(self, path: str, posts: int):
+        from django.core.management import call_command
+
+        connections.databases[BENCH_ALIAS] = {
+            **connections.databases['default'], 'NAME': path}
+        connections.ensure_defaults(BENCH_ALIAS)
+        connections.prepare_test_settings(BENCH_ALIAS)
+        call_command('migrate', database=BENCH_ALIAS, verbosity=0)
+        now = timezone.now()
+        with connections[BENCH_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO auth_user (id, password, is_superuser, "
+                "username, first_name, last_name, email, is_staff, "
+                "is_active, date_joined) VALUES "
+                "(1, '', 0, 'bench', '', '', '', 0, 1, %s)", [now])
+            cursor.executemany(
+                'INSERT INTO blog_post (is_published, created_at, '
+                'updated_at, title, text, excerpt, pub_date, author_id, '
+                "image, image_renditions, comment_count, "
+                'published_comment_count) VALUES '
+                "(1, %s, %s, %s, %s, %s, %s, 1, '', '{}', 0, 0)",
+                [(now, now, f'Пост {i}', 'Текст ' * 50, 'Текст',
+                  now - timezone.timedelta(minutes=i))
+                 for i in range(posts)])
+        connections[BENCH_ALIAS].close()
+
+    def run_profile(self, name: str, pragmas: dict, options):
+        connection = connections[BENCH_ALIAS]
+        apply_pragmas(connection, pragmas)
+        connection.close()
+        previous = settings.SQLITE_PRAGMAS
+        settings.SQLITE_PRAGMAS = pragmas
+        try:
+            deadline = time.perf_counter() + options['seconds']
+            workers = [
+                Worker(index < options['writers'], options['posts'],
+                       deadline)
+                for index in range(options['readers'] + options['writers'])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            settings.SQLITE_PRAGMAS = previous
+        self.report(name, workers, options['seconds'])
+
+    def report(self, name, workers, seconds):
+        for writer, label in ((False, 'чтение'), (True, 'запись')):
+            latencies = sorted(
+                latency for worker in workers if worker.writer is writer
+                for latency in worker.latencies)
+            errors = sum(
+                worker.errors for worker in workers
+                if worker.writer is writer)
+            p95 = (
+                statistics.quantiles(latencies, n=20)[-1] * 1000
+                if len(latencies) >= 20 else 0)
+            self.stdout.write(
+                f'{name:<10} {label:<7} {len(latencies) / seconds:9.0f} '
+                f'оп/с  p95 {p95:7.2f} мс  ошибок блокировки: {errors}')
@@ -0,0 +1,73 @@
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.constants import MEDIA_GC_GRACE_HOURS
+from blog.images import rendition_files
+from blog.models import ImageJob, Post
+
+
+def count_references() -> Counter:
+    """Сколько раз на каждый файл ссылаются посты и задания очереди."""
+    references = Counter()
+    for image, renditions in Post.objects.exclude(image='').exclude(
+            image__isnull=True).values_list(
+                'image', 'image_renditions').iterator():
+        references[image] += 1
+        references.update(rendition_files(renditions or {}))
+    references.update(ImageJob.objects.filter(
+        status__in=(ImageJob.PENDING, ImageJob.RUNNING)
+    ).values_list('image_name', flat=True))
+    return references
+
+
+def walk(storage, directory=''):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT файлы, на которые не ссылается ни один '
+        'пост. Одинаковые загрузки хранятся одним файлом, поэтому файл '
+        'удаляется только когда на него не осталось ни одной ссылки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=MEDIA_GC_GRACE_HOURS,
+            help='Не удалять файлы моложе указанного числа часов.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, которые будут удалены.')
+
+    def handle(self, *args, grace_hours, dry_run, **options):
+        storage = default_storage
+        references = count_references()
+        threshold = timezone.now() - timedelta(hours=grace_hours)
+        total = shared = removed = freed = 0
+        for name in walk(storage):
+            total += 1
+            if references[name]:
+                shared += references[name] > 1
+                continue
+            if storage.get_modified_time(name) > threshold:
+                continue
+            size = storage.size(name)
+            if dry_run:
+                self.stdout.write(f'{name} ({size} байт)')
+            else:
+                storage.delete(name)
+            removed += 1
+            freed += size
+        action = 'К удалению' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов: {total}, общих для нескольких ссылок: {shared}. '
+            f'{action}: {removed} ({freed} байт).'))
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import GLOBAL_SCOPE, bump_generations
+from blog.db import close_connections_before_fork
+from blog.images import (
+    generate_renditions, renditions_are_current, sync_post_files
+)
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии изображений постов. Изображения '
+        'обрабатываются параллельно в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов; по умолчанию — по числу ядер.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Количество постов в одной порции.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать и уже существующие копии.')
+
+    def handle(self, *args, workers, chunk_size, **options):
+        queryset = Post.objects.exclude(image='').exclude(
+            image__isnull=True).only('pk', 'image', 'image_renditions')
+        last_pk = 0
+        updated = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                posts = list(
+                    queryset.filter(pk__gt=last_pk).order_by('pk')[
+                        :chunk_size])
+                if not posts:
+                    break
+                last_pk = posts[-1].pk
+                if not options['all']:
+                    posts = [
+                        post for post in posts
+                        if not renditions_are_current(post)]
+                # Дочерние процессы работают только с файлами.
+                close_connections_before_fork()
+                futures = {
+                    executor.submit(generate_renditions, post.image.name):
+                        post
+                    for post in posts
+                }
+                done = []
+                for future in as_completed(futures):
+                    post = futures[future]
+                    try:
+                        post.image_renditions = future.result()
+                    except Exception as error:
+                        failed += 1
+                        self.stderr.write(
+                            f'Пост {post.pk} ({post.image.name}): {error}')
+                        continue
+                    # bulk_update не заполняет auto_now, а по updated_at
+                    # строится ETag страницы поста.
+                    post.updated_at = timezone.now()
+                    done.append(post)
+                with transaction.atomic():
+                    Post.objects.bulk_update(
+                        done, ['image_renditions', 'updated_at'])
+                    sync_post_files(done)
+                updated += len(done)
+        if updated:
+            # bulk_update не отправляет сигналы: файлы постов записаны
+            # выше, а кеш страниц сбрасываем здесь.
+            bump_generations([GLOBAL_SCOPE])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {updated}, с ошибками: {failed}.'))
@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from blog.db import close_connections_before_fork
+from blog.jobs import (
+    claim_jobs, complete_job, fail_job, process_image, queue_stats,
+    requeue_stale_jobs
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь заданий на создание уменьшенных копий '
+        'изображений в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов; по умолчанию — по числу ядер.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.')
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Показать глубину очереди и время обработки и выйти.')
+
+    def handle(self, *args, workers, poll_interval, **options):
+        if options['status']:
+            self.print_status()
+            return
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь заданий: {requeued}.')
+        processed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                # Берём с запасом, чтобы процессы не простаивали, пока
+                # основной процесс записывает результаты.
+                jobs = claim_jobs(workers * 2)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                # Дочерние процессы работают только с файлами.
+                close_connections_before_fork()
+                futures = {
+                    executor.submit(process_image, job.image_name): job
+                    for job in jobs
+                }
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        renditions, duration = future.result()
+                    except Exception as error:
+                        fail_job(job, error)
+                        self.stderr.write(
+                            f'{job.image_name}: {job.error} '
+                            f'(попытка {job.attempts})')
+                        continue
+                    complete_job(job, renditions, duration)
+                    processed += 1
+                    self.stdout.write(
+                        f'{job.image_name}: {duration * 1000:.0f} мс')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {processed}.'))
+
+    def print_status(self):
+        stats = queue_stats()
+        depth = stats['depth']
+        self.stdout.write(
+            f'В очереди: {depth["pending"]}\n'
+            f'Выполняется: {depth["running"]}\n'
+            f'Готово: {depth["done"]}\n'
+            f'С ошибкой: {depth["failed"]}\n'
+            f'Ожидает дольше всех: {stats["oldest_pending_age"]:.0f} с\n'
+            f'Время обработки: в среднем '
+            f'{stats["avg_duration"] * 1000:.0f} мс, '
+            f'максимум {stats["max_duration"] * 1000:.0f} мс'
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import get_render_stats, get_stats
+
+TIMED_TEMPLATES = ('post_card',)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания и промахи кеша страниц и время отрисовки '
+        'кешируемых фрагментов шаблонов.'
+    )
+
+    def handle(self, *args, **options):
+        stats = get_stats(('page_hit', 'page_miss'))
+        total = stats['page_hit'] + stats['page_miss']
+        ratio = stats['page_hit'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["page_hit"]}\n'
+            f'Промахов: {stats["page_miss"]}\n'
+            f'Доля попаданий: {ratio:.1%}'
+        )
+        for name in TIMED_TEMPLATES:
+            render = get_render_stats(name)
+            self.stdout.write(
+                f'{name}: отрисовок {render["count"]}, '
+                f'всего {render["total_ms"]:.1f} мс, '
+                f'в среднем {render["avg_ms"]:.3f} мс'
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import (
+    COMMENT_FTS_TABLE, POST_FTS_TABLE, fts_available, rebuild_index
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает полнотекстовые индексы постов и комментариев. '
+        'Нужен после массовых изменений в обход триггеров, например '
+        'после загрузки дампа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize', action='store_true',
+            help='После перестройки слить сегменты индекса в один.')
+
+    def handle(self, *args, optimize, **options):
+        if not fts_available():
+            raise CommandError(
+                'Полнотекстовый индекс FTS5 есть только на SQLite.')
+        for table in (POST_FTS_TABLE, COMMENT_FTS_TABLE):
+            rebuild_index(table, optimize=optimize)
+            self.stdout.write(self.style.SUCCESS(
+                f'Индекс {table} перестроен.'))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from blog.counters import recount_comment_counters
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает разошедшиеся счётчики комментариев постов. '
+        'Посты обрабатываются диапазонами id, каждый диапазон — '
+        'отдельной короткой транзакцией, без блокировки всей таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество id в одном диапазоне.')
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между диапазонами в секундах.')
+
+    def handle(self, *args, chunk_size, pause, **options):
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('Постов нет.')
+            return
+        fixed = 0
+        for low in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            fixed += recount_comment_counters(
+                Post.objects.filter(pk__gte=low, pk__lt=low + chunk_size)
+                .values('pk')
+            )
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}.'))
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Имитирует асинхронную репликацию для локальной проверки '
+        'ReplicaRouter: раз в --lag секунд копирует основную базу SQLite '
+        'в файлы реплик через backup API. Между копиями реплики отстают.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=float, default=2.0,
+            help='Пауза между копиями в секундах.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Скопировать один раз и выйти.')
+
+    def handle(self, *args, lag, once, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError(
+                'Реплики не настроены: задайте DATABASE_REPLICA_URLS.')
+        aliases = (DEFAULT_DB_ALIAS, *replicas)
+        if any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError('Имитация репликации работает только с SQLite.')
+        while True:
+            self.replicate(replicas)
+            if once:
+                return
+            time.sleep(lag)
+
+    def replicate(self, replicas):
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+        self.stdout.write(f'Реплики обновлены: {", ".join(replicas)}.')
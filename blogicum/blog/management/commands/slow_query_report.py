@@ -0,0 +1,86 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'count': lambda group: group['count'],
+    'max': lambda group: group['max_ms'],
+}
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных запросов: запросы сгруппированы по '
+        'отпечатку и упорядочены по суммарному времени.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=None,
+            help='Путь к журналу; по умолчанию SLOW_QUERY_LOG.')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=tuple(SORT_KEYS), default='total')
+
+    def handle(self, *args, log, limit, sort, **options):
+        groups = self.aggregate(log or settings.SLOW_QUERY_LOG)
+        if not groups:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        ranked = sorted(groups.values(), key=SORT_KEYS[sort], reverse=True)
+        for place, group in enumerate(ranked[:limit], start=1):
+            self.write_group(place, group)
+
+    def aggregate(self, path: str) -> dict:
+        groups = {}
+        try:
+            log = open(path, encoding='utf-8')
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден.')
+        with log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                group = groups.setdefault(entry['fingerprint'], {
+                    'fingerprint': entry['fingerprint'], 'count': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'durations': [],
+                    'sql': None, 'plan': None,
+                    'views': Counter(), 'origins': Counter(),
+                })
+                duration = entry['duration_ms']
+                group['count'] += 1
+                group['total_ms'] += duration
+                group['max_ms'] = max(group['max_ms'], duration)
+                group['durations'].append(duration)
+                group['views'][entry.get('view') or '—'] += 1
+                group['origins'][entry.get('origin') or '—'] += 1
+                if group['sql'] is None and entry.get('sql'):
+                    group['sql'] = entry['sql']
+                    group['plan'] = entry.get('plan')
+        return groups
+
+    def write_group(self, place: int, group: dict):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{place}. {group["fingerprint"]}: {group["count"]} раз, '
+            f'всего {group["total_ms"]:.0f} мс, '
+            f'p95 {percentile(group["durations"], 0.95):.0f} мс, '
+            f'макс. {group["max_ms"]:.0f} мс'))
+        self.stdout.write(f'   {group["sql"] or "(текст не записан)"}')
+        views = ', '.join(
+            f'{view} ({count})'
+            for view, count in group['views'].most_common(3))
+        self.stdout.write(f'   Представления: {views}')
+        origin, _ = group['origins'].most_common(1)[0]
+        self.stdout.write(f'   Откуда: {origin}')
+        for row in group['plan'] or ():
+            self.stdout.write(f'   План: {row}')
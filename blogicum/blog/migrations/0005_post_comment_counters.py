@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:27
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    db_alias = schema_editor.connection.alias
+
+    def count_comments(**filters):
+        comments = Comment.objects.using(db_alias).filter(
+            post=OuterRef('pk'), **filters
+        ).order_by().values('post').annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(comments, output_field=IntegerField()), 0)
+
+    Post.objects.using(db_alias).update(
+        comment_count=count_comments(),
+        published_comment_count=count_comments(is_published=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_auto_20250202_0327'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ('-created_at',), 'verbose_name': 'комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='published_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество опубликованных комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counters, migrations.RunPython.noop),
+    ]
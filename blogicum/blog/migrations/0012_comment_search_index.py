@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Полнотекстовый индекс FTS5 по тексту комментариев для поиска в админке;
+# устроен так же, как blog_post_fts из 0011_post_search_index.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE blog_comment_fts USING fts5(
+        text,
+        content='blog_comment', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_comment_fts_insert AFTER INSERT ON blog_comment
+    BEGIN
+        INSERT INTO blog_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_comment_fts_delete AFTER DELETE ON blog_comment
+    BEGIN
+        INSERT INTO blog_comment_fts(blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_comment_fts_update AFTER UPDATE OF text
+    ON blog_comment
+    WHEN old.text IS NOT new.text BEGIN
+        INSERT INTO blog_comment_fts(blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO blog_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    "INSERT INTO blog_comment_fts(blog_comment_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS blog_comment_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_comment_fts_update',
+    'DROP TABLE IF EXISTS blog_comment_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL),
+                             run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# GIN-индекс для полнотекстового поиска на PostgreSQL. Выражение совпадает
+# с blog.search.POSTGRES_DOCUMENT; на SQLite поиск идёт через FTS5
+# (миграция 0011).
+CREATE_SQL = (
+    """
+    CREATE INDEX blog_post_search_idx ON blog_post USING gin ((
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(text, '')), 'B')
+    ))
+    """,
+)
+
+DROP_SQL = (
+    'DROP INDEX IF EXISTS blog_post_search_idx',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(CREATE_SQL),
+                             run_on_postgresql(DROP_SQL)),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.utils.text import Truncator
+
+# Посты в одной порции bulk_update.
+CHUNK_SIZE = 500
+# Значения blog.constants.EXCERPT_WORDS и blog.models.make_excerpt на момент
+# миграции: их последующие изменения не должны менять её результат.
+EXCERPT_WORDS = 10
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def fill_excerpts(apps, schema_editor):
+    """Заполняет краткое содержание постов, созданных до миграции 0007."""
+    Post = apps.get_model('blog', 'Post')
+    db_alias = schema_editor.connection.alias
+    queryset = Post.objects.using(db_alias).filter(
+        excerpt='').exclude(text='').only('pk', 'text').order_by('pk')
+    last_pk = 0
+    while True:
+        posts = list(queryset.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not posts:
+            break
+        for post in posts:
+            post.excerpt = make_excerpt(post.text)
+        Post.objects.using(db_alias).bulk_update(posts, ['excerpt'])
+        last_pk = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_search_index_postgresql'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
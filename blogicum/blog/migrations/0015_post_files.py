@@ -0,0 +1,64 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Записи PostFile в одной порции bulk_create.
+CHUNK_SIZE = 500
+
+
+def post_file_names(image, renditions):
+    # Копия blog.images.post_file_names на момент миграции.
+    names = set()
+    for rendition in (renditions or {}).values():
+        if isinstance(rendition, dict):
+            for name, _ in rendition.get('webp', []) + rendition.get(
+                    'fallback', []):
+                names.add(name)
+    if image:
+        names.add(image)
+    return names
+
+
+def fill_post_files(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    PostFile = apps.get_model('blog', 'PostFile')
+    db_alias = schema_editor.connection.alias
+    files = []
+    for pk, image, renditions in Post.objects.using(db_alias).exclude(
+            image='').exclude(image__isnull=True).values_list(
+                'pk', 'image', 'image_renditions').iterator():
+        files.extend(
+            PostFile(post_id=pk, name=name)
+            for name in post_file_names(image, renditions))
+        if len(files) >= CHUNK_SIZE:
+            PostFile.objects.using(db_alias).bulk_create(files)
+            files = []
+    PostFile.objects.using(db_alias).bulk_create(files)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_excerpt_backfill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=256, verbose_name='Файл')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'файл публикации',
+                'verbose_name_plural': 'Файлы публикаций',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postfile',
+            constraint=models.UniqueConstraint(fields=('name', 'post'), name='postfile_name_post_uniq'),
+        ),
+        migrations.RunPython(fill_post_files, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,24 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils.text import Truncator
 
-from blog.constants import MAX_LENGTH, MAX_LENGTH_SLUG
+from blog.constants import EXCERPT_WORDS, MAX_LENGTH, MAX_LENGTH_SLUG
 
 
 User = get_user_model()
 
 
+def make_excerpt(text: str) -> str:
+    """Краткое содержание поста, как у фильтра truncatewords."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
 class PublishedModel(models.Model):
-    """Абстрактная модель. Добвляет флаг is_published и дату created_at."""
+    """Абстрактная модель.
+
+    Добвляет флаг is_published и даты created_at и updated_at.
+    """
 
     is_published = models.BooleanField(
         default=True,
@@ -17,6 +26,8 @@ class PublishedModel(models.Model):
         help_text='Снимите галочку, чтобы скрыть публикацию.')
     created_at = models.DateTimeField(auto_now_add=True,
                                       verbose_name='Добавлено')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Изменено')
 
     class Meta:
         abstract = True
@@ -56,6 +67,8 @@ class Category(PublishedModel):
 class Post(PublishedModel):
     title = models.CharField(max_length=MAX_LENGTH, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.TextField(
+        blank=True, editable=False, verbose_name='Краткое содержание')
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=(
@@ -85,11 +98,38 @@ class Post(PublishedModel):
     )
     image = models.ImageField('Изображение',
                               upload_to='post_images', null=True, blank=True)
+    image_renditions = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name='Уменьшенные копии изображения')
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество комментариев')
+    published_comment_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество опубликованных комментариев')
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_published=True),
+                         name='post_published_pub_date_idx'),
+            models.Index(fields=('category', 'pub_date'),
+                         condition=models.Q(is_published=True),
+                         name='post_category_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'text' not in self.get_deferred_fields() and (
+                update_fields is None or 'text' in update_fields):
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.id})
@@ -119,6 +159,98 @@ class Comment(PublishedModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created_at',)
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_at_idx'),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_state()
+        return instance
+
+    def remember_counted_state(self):
+        """Запоминает состояние, учтённое в счётчиках поста."""
+        self._counted_state = (
+            self.__dict__.get('post_id'), self.__dict__.get('is_published'))
 
     def __str__(self):
         return f'Комментарий от {self.author} к {self.post}'
+
+
+class PostFile(models.Model):
+    """Файл в MEDIA_ROOT, принадлежащий посту: изображение или его копия.
+
+    По индексу на name serve_media находит владельца файла, не читая
+    таблицу постов. Одинаковые загрузки хранятся одним файлом, поэтому
+    один файл может принадлежать нескольким постам.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='files',
+        verbose_name='Публикация'
+    )
+    name = models.CharField(max_length=MAX_LENGTH, verbose_name='Файл')
+
+    class Meta:
+        verbose_name = 'файл публикации'
+        verbose_name_plural = 'Файлы публикаций'
+        constraints = (
+            models.UniqueConstraint(fields=('name', 'post'),
+                                    name='postfile_name_post_uniq'),
+        )
+
+    def __str__(self):
+        return self.name
+
+
+class ImageJob(models.Model):
+    """Задание на создание уменьшенных копий изображения поста."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    image_name = models.CharField(max_length=MAX_LENGTH,
+                                  verbose_name='Файл изображения')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES,
+                              default=PENDING, verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Добавлено')
+    started_at = models.DateTimeField(null=True, blank=True,
+                                      verbose_name='Начато')
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name='Завершено')
+    duration = models.FloatField(null=True, blank=True,
+                                 verbose_name='Время обработки, с')
+
+    class Meta:
+        verbose_name = 'задание обработки изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('-created_at',)
+        indexes = (
+            models.Index(fields=('status', 'created_at'),
+                         name='imagejob_status_created_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.image_name} ({self.get_status_display()})'
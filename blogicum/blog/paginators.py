@@ -0,0 +1,110 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    """Некорректный или повреждённый курсор."""
+
+
+def encode_cursor(post) -> str:
+    """Кодирует позицию поста (pub_date, id) в непрозрачный токен."""
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """Восстанавливает (pub_date, id) из токена."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        pub_date, pk = base64.urlsafe_b64decode(
+            padded.encode()).decode().split('|')
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(token) from error
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса django.core.paginator.Page, которая нужна
+    шаблонам, и добавляет токены для соседних страниц.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list: List, has_next: bool,
+                 has_previous: bool):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация постов по (pub_date, id), от новых к старым.
+
+    В отличие от OFFSET-пагинации не пропускает строки и не считает
+    COUNT(*): каждая страница — один запрос с LIMIT по индексу.
+    """
+
+    ordering = ('-pub_date', '-pk')
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, after: Optional[str] = None,
+             before: Optional[str] = None) -> CursorPage:
+        if before:
+            pub_date, pk = decode_cursor(before)
+            rows = list(
+                self.queryset.filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, pk__gt=pk)
+                ).order_by('pub_date', 'pk')[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            return CursorPage(
+                rows[:self.per_page][::-1],
+                has_next=True, has_previous=has_previous
+            )
+        queryset = self.queryset.order_by(*self.ordering)
+        if after:
+            pub_date, pk = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+        rows = list(queryset[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page, has_previous=bool(after)
+        )
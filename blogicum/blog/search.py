@@ -0,0 +1,115 @@
+import re
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from blog.constants import SEARCH_MAX_TERMS
+
+POST_FTS_TABLE = 'blog_post_fts'
+COMMENT_FTS_TABLE = 'blog_comment_fts'
+
+# Веса столбцов для bm25(): совпадение в заголовке важнее, чем в тексте.
+POST_FTS_WEIGHTS = (10.0, 1.0)
+
+# Документ поиска на PostgreSQL: заголовок с весом A, текст с весом B.
+# Выражение должно совпадать с GIN-индексом из миграции 0013, иначе
+# планировщик индекс не использует.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(blog_post.title, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(blog_post.text, '')),"
+    " 'B')"
+)
+
+TERM_RE = re.compile(r'\w+')
+
+
+def search_terms(query: str) -> list:
+    return TERM_RE.findall(query.lower())[:SEARCH_MAX_TERMS]
+
+
+def build_match_query(query: str) -> str:
+    """Переводит пользовательский запрос в выражение FTS5 MATCH.
+
+    Каждое слово ищется как префикс ("слово"*), слова объединяются через
+    AND. Операторы FTS5 из запроса не передаются: слова берутся в кавычки.
+    """
+    return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+
+def fts_available() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def search_posts(queryset: QuerySet, query: str) -> QuerySet:
+    """Отбирает из queryset посты по запросу, лучшие совпадения первыми.
+
+    На SQLite используется индекс FTS5 blog_post_fts с ранжированием
+    bm25, на PostgreSQL — tsvector с GIN-индексом и ts_rank; на других
+    базах — поиск подстроки по заголовку и тексту.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    if fts_available():
+        return _search_sqlite(queryset, query)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(text__icontains=term)
+    return queryset.filter(condition).order_by('-pub_date')
+
+
+def _search_sqlite(queryset: QuerySet, query: str) -> QuerySet:
+    weights = ', '.join(str(weight) for weight in POST_FTS_WEIGHTS)
+    return queryset.extra(
+        select={'rank': f'bm25({POST_FTS_TABLE}, {weights})'},
+        tables=[POST_FTS_TABLE],
+        where=[
+            f'{POST_FTS_TABLE} MATCH %s',
+            f'{POST_FTS_TABLE}.rowid = blog_post.id',
+        ],
+        params=[build_match_query(query)],
+    ).order_by('rank', '-pub_date')
+
+
+def _search_postgresql(queryset: QuerySet, terms: list) -> QuerySet:
+    # Слова состоят только из \w, операторов tsquery в них нет.
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    return queryset.extra(
+        select={'rank': f"ts_rank({POSTGRES_DOCUMENT}, "
+                        f"to_tsquery('simple', %s))"},
+        select_params=[tsquery],
+        where=[f"{POSTGRES_DOCUMENT} @@ to_tsquery('simple', %s)"],
+        params=[tsquery],
+    ).order_by('-rank', '-pub_date')
+
+
+def matching_ids(table: str, query: str) -> RawSQL:
+    """Подзапрос id строк, найденных индексом FTS5 table.
+
+    Годится для фильтра pk__in: сортировка и пагинация остаются за
+    основным запросом.
+    """
+    return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+                  (build_match_query(query),))
+
+
+def prefix_q(field: str, prefix: str) -> Q:
+    """Условие «field начинается с prefix» в виде диапазона.
+
+    В отличие от startswith (LIKE без учёта регистра в SQLite) диапазон
+    использует обычный индекс по полю, например уникальный индекс
+    auth_user.username.
+    """
+    return Q(**{f'{field}__gte': prefix,
+                f'{field}__lt': prefix + '\U0010ffff'})
+
+
+def rebuild_index(table: str, optimize: bool = False) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('optimize')")
@@ -0,0 +1,152 @@
+import threading
+from typing import Iterable, List
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from blog.cache import (
+    FEED_SCOPE, GLOBAL_SCOPE, author_scope, bump_generations, category_scope,
+    post_scope
+)
+from blog.counters import (
+    change_comment_counters, comment_counter_deltas, recount_comment_counters
+)
+from blog.images import sync_post_files
+from blog.models import Category, Comment, Location, Post
+
+
+User = get_user_model()
+
+# Посты, которые сейчас удаляются вместе с комментариями: каскад вызывает
+# post_delete для каждого комментария, и обновлять счётчики и сбрасывать
+# кеш уже удаляемого поста незачем.
+_deleting = threading.local()
+
+
+def deleting_post_ids() -> set:
+    if not hasattr(_deleting, 'post_ids'):
+        _deleting.post_ids = set()
+    return _deleting.post_ids
+
+
+def post_page_scopes(post_ids: Iterable[int]) -> List[str]:
+    """Области кеша страниц, на которых показаны указанные посты."""
+    scopes = [FEED_SCOPE]
+    for post_id, slug, username in Post.objects.filter(
+            pk__in=set(post_ids)).values_list(
+                'pk', 'category__slug', 'author__username'):
+        scopes.append(post_scope(post_id))
+        scopes.append(author_scope(username))
+        if slug:
+            scopes.append(category_scope(slug))
+    return scopes
+
+
+@receiver(post_save, sender=Comment)
+def update_counters_on_comment_save(sender, instance, created, raw,
+                                    **kwargs):
+    """Обновляет счётчики при создании, переносе и (де)публикации."""
+    if raw:
+        return
+    if created:
+        before = None
+    elif hasattr(instance, '_counted_state'):
+        before = instance._counted_state
+    else:
+        # Прежнее состояние неизвестно: пересчитываем пост целиком.
+        recount_comment_counters([instance.post_id])
+        instance.remember_counted_state()
+        return
+    change_comment_counters(comment_counter_deltas(
+        before, (instance.post_id, instance.is_published)))
+    instance._previous_counted_state = before
+    instance.remember_counted_state()
+
+
+@receiver(post_delete, sender=Comment)
+def update_counters_on_comment_delete(sender, instance, **kwargs):
+    """Уменьшает счётчики поста при удалении комментария."""
+    if instance.post_id in deleting_post_ids():
+        return
+    before = getattr(instance, '_counted_state', None) or (
+        instance.post_id, instance.is_published)
+    change_comment_counters(comment_counter_deltas(before, None))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_page_scopes(sender, instance, raw, **kwargs):
+    """Запоминает страницы, где пост был виден до изменения."""
+    if not raw and instance.pk:
+        instance._previous_page_scopes = post_page_scopes([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def invalidate_pages_on_post_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    bump_generations(
+        post_page_scopes([instance.pk])
+        + getattr(instance, '_previous_page_scopes', [])
+    )
+
+
+@receiver(post_save, sender=Post)
+def sync_files_on_post_save(sender, instance, created, raw, update_fields,
+                            **kwargs):
+    """Обновляет PostFile, если у поста могли измениться файлы."""
+    if raw or (update_fields is not None and not (
+            {'image', 'image_renditions'} & set(update_fields))):
+        return
+    sync_post_files([instance], created=created)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    deleting_post_ids().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_pages_on_post_delete(sender, instance, **kwargs):
+    deleting_post_ids().discard(instance.pk)
+    scopes = [FEED_SCOPE, post_scope(instance.pk)]
+    slug = Category.objects.filter(
+        pk=instance.category_id).values_list('slug', flat=True).first()
+    if slug:
+        scopes.append(category_scope(slug))
+    username = User.objects.filter(
+        pk=instance.author_id).values_list('username', flat=True).first()
+    if username:
+        scopes.append(author_scope(username))
+    bump_generations(scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_pages_on_comment_change(sender, instance, **kwargs):
+    """Комментарий меняет страницу поста и счётчик в его карточках."""
+    if kwargs.get('raw') or instance.post_id in deleting_post_ids():
+        return
+    post_ids = {instance.post_id}
+    counted_state = getattr(instance, '_previous_counted_state', None)
+    if counted_state and counted_state[0]:
+        post_ids.add(counted_state[0])
+    bump_generations(post_page_scopes(post_ids))
+
+
+@receiver(post_save, sender=User)
+def invalidate_pages_on_user_save(sender, instance, raw, **kwargs):
+    """Имя и прочие данные автора показаны на странице его профиля."""
+    if not raw:
+        bump_generations([author_scope(instance.username)])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, **kwargs):
+    if not kwargs.get('raw'):
+        bump_generations([GLOBAL_SCOPE])
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 их содержимого.
+
+    post_images/photo.jpg -> post_images/<sha256>.jpg
+
+    Хеш считается по ходу записи во временный файл рядом с итоговым,
+    так что загрузка не копируется в память целиком. Одинаковые загрузки
+    получают одно имя и хранятся одним файлом; файлы, на которые больше
+    никто не ссылается, удаляет команда gc_media.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя выбирает _save() по содержимому; суффиксы не нужны.
+        return name
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name)
+        extension = posixpath.splitext(basename)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(full_directory, self.directory_permissions_mode)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = posixpath.join(directory, digest.hexdigest() + extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # Файл мог остаться без ссылок и ждать gc_media: свежее
+                # время изменения продлевает ему отсрочку, пока пост с
+                # новой ссылкой не сохранён.
+                os.utime(full_path)
+            else:
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
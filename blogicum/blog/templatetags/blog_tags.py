@@ -0,0 +1,64 @@
+import time
+
+from django import template
+
+from blog.cache import record_render_time
+from blog.images import renditions_are_current
+
+register = template.Library()
+
+
+class TimedNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        started = time.perf_counter()
+        output = self.nodelist.render(context)
+        record_render_time(
+            context.get('request'), self.name.resolve(context),
+            time.perf_counter() - started)
+        return output
+
+
+@register.tag
+def timed(parser, token):
+    """Замеряет время отрисовки блока.
+
+    Использование: {% timed "post_card" %}...{% endtimed %}
+    """
+    try:
+        _, name = token.split_contents()
+    except ValueError:
+        raise template.TemplateSyntaxError(
+            "'timed' принимает ровно один аргумент — имя метрики.")
+    nodelist = parser.parse(('endtimed',))
+    parser.delete_first_token()
+    return TimedNode(parser.compile_filter(name), nodelist)
+
+
+def _srcset(storage, files) -> str:
+    return ', '.join(f'{storage.url(name)} {width}w' for name, width in files)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, rendition):
+    """Изображение поста с srcset из уменьшенных копий.
+
+    Пока копии не созданы, показывается оригинал.
+    Использование: {% post_image post "card" %}
+    """
+    if not renditions_are_current(post):
+        return {'post': post, 'image': None}
+    image = post.image_renditions[rendition]
+    storage = post.image.storage
+    return {
+        'post': post,
+        'image': image,
+        'src': storage.url(image['fallback'][0][0]),
+        'webp_srcset': _srcset(storage, image['webp']),
+        'fallback_srcset': _srcset(storage, image['fallback']),
+        'sizes': f'(max-width: {image["width"]}px) 100vw, '
+                 f'{image["width"]}px',
+    }
@@ -14,8 +14,11 @@ urlpatterns = [
          name='edit_post'),
     path('posts/<int:post_id>/delete/', views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('search/', views.PostSearchView.as_view(), name='search'),
 
     # Comment-related URLs
+    path('posts/<int:post_id>/comments/', views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/<int:post_id>/comment/',
          views.CommentCreateView.as_view(), name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<comment_id>/',
@@ -33,3 +36,22 @@ urlpatterns = [
     path('category/<slug:category_slug>/', views.CategoryPostsView.as_view(),
          name='category_posts'),
 ]
+
+# Наибольшее число SQL-запросов на один HTTP-запрос к маршруту; проверяется
+# в тестах фикстурой query_budgets (tests/fixtures/queries.py). Бюджет
+# покрывает худший случай: авторизованный пользователь, пустой кеш.
+QUERY_BUDGETS = {
+    'index': 6,
+    'post_detail': 6,
+    'create_post': 13,
+    'edit_post': 13,
+    'delete_post': 15,
+    'search': 5,
+    'post_comments': 4,
+    'add_comment': 7,
+    'edit_comment': 8,
+    'delete_comment': 10,
+    'edit_profile': 4,
+    'profile': 8,
+    'category_posts': 8,
+}
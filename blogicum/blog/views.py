@@ -1,6 +1,8 @@
-from typing import Optional, Type
+import hashlib
+from urllib.parse import urlencode
+from typing import Optional, Tuple, Type
 
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import (
     CreateView, DeleteView, DetailView, ListView, UpdateView
@@ -9,11 +11,26 @@ from django.urls import reverse_lazy, reverse
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth import get_user_model
 from django.contrib.auth import get_user_model
-from django.db.models import Prefetch, Q, QuerySet
+from django.core.paginator import Page, Paginator
+from django.db import DEFAULT_DB_ALIAS, router
+from django.db.models import Max, OuterRef, Q, QuerySet, Subquery
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
+from blog.cache import (
+    FEED_SCOPE, GLOBAL_SCOPE, author_scope, cache_page_response,
+    category_scope, flush_render_timings, get_cached_page, page_cache_key,
+    post_scope, scopes_validator, stamp_card_versions
+)
+from blog.jobs import enqueue_renditions
 from blog.models import Post, Category, Comment
-from blog.constants import PAGINATE_BY
+from blog.constants import (
+    COMMENTS_PAGINATE_BY, CURSOR_PAGINATION_DEPTH, PAGINATE_BY
+)
+from blog.paginators import CursorPaginator, InvalidCursor, encode_cursor
+from blog.search import search_posts
+from blogicum.routers import read_from_primary
 from .forms import PostForm, UserEditProfileForm, CategoryForm, CommentForm
 
 
@@ -35,6 +52,149 @@ class OnlyAuthorMixin(UserPassesTestMixin):
         return redirect('blog:index')
 
 
+class ConditionalGetMixin:
+    """Миксин условных GET-запросов (ETag / Last-Modified, ответ 304).
+
+    Валидатор строится в get_validator() из кеша и не более чем одного
+    короткого запроса, поэтому неизменившаяся страница отдаётся без
+    основного запроса и отрисовки шаблона.
+    """
+
+    def get_validator(self) -> Optional[dict]:
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        validator = self.get_validator()
+        if validator is None:
+            return super().dispatch(request, *args, **kwargs)
+        dates = [value for value in validator.values()
+                 if hasattr(value, 'timestamp')]
+        last_modified = int(max(dates).timestamp()) if dates else None
+        fingerprint = '|'.join(
+            [request.get_full_path(), str(request.user.pk)]
+            + [f'{key}={validator[key]}' for key in sorted(validator)]
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+def get_list_validator(queryset: QuerySet[Post],
+                       scopes: Tuple[str, ...]) -> dict:
+    """Валидатор страницы со списком постов.
+
+    Правки постов, комментариев, категорий и авторов увеличивают
+    поколения областей кеша страницы, поэтому валидатор берётся из кеша.
+    Из базы читается только дата публикации самого нового видимого поста
+    (первая строка индекса ленты): она меняется, когда наступает время
+    отложенной публикации, хотя в базу при этом никто не пишет.
+    """
+    validator = scopes_validator((GLOBAL_SCOPE,) + scopes)
+    validator['newest'] = queryset.order_by('-pub_date').values_list(
+        'pub_date', flat=True).first()
+    return validator
+
+
+class AnonymousPageCacheMixin:
+    """Миксин кеширования страниц для анонимных GET-запросов.
+
+    Ключ включает путь с query string и поколения областей кеша из
+    get_cache_scopes(); сигналы моделей увеличивают поколения, поэтому
+    изменения сбрасывают только затронутые страницы. Страница, которая
+    попадёт в кеш, читается из основной базы, а не из реплики.
+    """
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        key = page_cache_key(
+            request, (GLOBAL_SCOPE,) + tuple(self.get_cache_scopes()))
+        response = get_cached_page(key)
+        if response is None:
+            # Отрисовка шаблона тоже читает базу, поэтому и она внутри.
+            with read_from_primary():
+                return cache_page_response(
+                    key, super().dispatch(request, *args, **kwargs))
+        return get_conditional_response(
+            request, etag=response.get('ETag'),
+            last_modified=response.last_modified, response=response)
+
+
+class ReplicaReadMixin:
+    """Миксин: GET-запросы представления читают данные из реплики.
+
+    Флаг проверяет blogicum.middleware.ReplicaRoutingMiddleware.
+    """
+
+    replica_reads: bool = True
+
+
+class PostCardsMixin:
+    """Миксин списков постов, выводимых через includes/post_card.html.
+
+    Проставляет карточкам версии для кеша фрагментов и после отрисовки
+    сбрасывает замеры времени отрисовки шаблонов. Посты, прочитанные из
+    реплики, фрагменты в кеш не записывают.
+    """
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        stamp_card_versions(
+            context['object_list'],
+            populate=router.db_for_read(Post) == DEFAULT_DB_ALIAS)
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response.add_post_render_callback(
+            lambda response: flush_render_timings(self.request))
+        return response
+
+
+class CursorPaginationMixin:
+    """Миксин курсорной пагинации списков постов.
+
+    Неглубокие страницы листаются по номеру (?page=), а начиная со
+    страницы CURSOR_PAGINATION_DEPTH ссылка «вперёд» переключает на
+    курсоры (?after=/?before=), которые не сканируют пропущенные строки
+    и не считают COUNT(*).
+    """
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        if after is None and before is None:
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(
+                    queryset.order_by(*CursorPaginator.ordering), page_size)
+            )
+            page.object_list = object_list = list(object_list)
+            page.next_cursor = None
+            if (page.number >= CURSOR_PAGINATION_DEPTH
+                    and page.has_next() and object_list):
+                page.next_cursor = encode_cursor(object_list[-1])
+            return paginator, page, object_list, is_paginated
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(after=after, before=before)
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
 def get_post_queryset() -> QuerySet[Post]:
     """Возвращает отфильтрованный набор постов."""
     return Post.objects.filter(
@@ -43,6 +203,28 @@ def get_post_queryset() -> QuerySet[Post]:
         pub_date__lte=timezone.now())
 
 
+def get_visible_post_queryset(user) -> QuerySet[Post]:
+    """Возвращает посты, страницы которых доступны пользователю."""
+    queryset = Post.objects.select_related('author', 'category', 'location')
+    if user.is_authenticated:
+        return queryset.filter(Q(is_published=True) | Q(author=user))
+    return queryset.filter(is_published=True, category__is_published=True)
+
+
+def get_comments_page(post: Post, page_number) -> Page:
+    """Возвращает страницу комментариев поста, от старых к новым.
+
+    Общее число комментариев берётся из счётчика поста, поэтому
+    страница — один ограниченный запрос без COUNT(*).
+    """
+    paginator = Paginator(
+        post.comments.select_related('author').order_by('created_at', 'pk'),
+        COMMENTS_PAGINATE_BY
+    )
+    paginator.count = post.comment_count
+    return paginator.get_page(page_number)
+
+
 def get_comment_object(self) -> Comment:
     """Возвращает отфильтрованный объект сообщения."""
     return get_object_or_404(
@@ -54,50 +236,87 @@ def get_comment_object(self) -> Comment:
     )
 
 
-def get_counted_comments(queryset) -> QuerySet[Post]:
-    """Подсчитывает и возвращает количество комментриев."""
-    queryset = queryset.prefetch_related('comments')
-
-    for post in queryset:
-        post.comment_count = post.comments.count()
-    return queryset
-
-
 # Post-related views
-class PostListView(ListView):
+class PostListView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                   ConditionalGetMixin, PostCardsMixin,
+                   CursorPaginationMixin, ListView):
     """View списка постов, доступных для просмотра."""
 
     model: Type[Post] = Post
     template_name: str = 'blog/index.html'
     paginate_by: int = PAGINATE_BY
 
+    def get_validator(self) -> Optional[dict]:
+        return get_list_validator(
+            get_post_queryset(), self.get_cache_scopes())
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (FEED_SCOPE,)
+
+    def get_queryset(self) -> QuerySet[Post]:
+        return get_post_queryset().select_related(
+            'author', 'category', 'location').defer('text')
+
+
+class PostSearchView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                     PostCardsMixin, ListView):
+    """View полнотекстового поиска по опубликованным постам."""
+
+    model: Type[Post] = Post
+    template_name: str = 'blog/search.html'
+    paginate_by: int = PAGINATE_BY
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (FEED_SCOPE,)
+
     def get_queryset(self) -> QuerySet[Post]:
-        return get_counted_comments(get_post_queryset().select_related(
-            'author', 'category', 'location'))
+        return search_posts(
+            get_post_queryset().select_related(
+                'author', 'category', 'location').defer('text'),
+            self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        context['query'] = query
+        context['page_query'] = urlencode({'q': query}) + '&'
+        return context
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                     ConditionalGetMixin, DetailView):
     """View детального отображения поста."""
 
     model: Type[Post] = Post
     template_name: str = 'blog/detail.html'
 
+    def get_validator(self) -> Optional[dict]:
+        try:
+            return get_visible_post_queryset(self.request.user).annotate(
+                comment_modified=Subquery(
+                    Comment.objects.filter(post=OuterRef('pk')).order_by()
+                    .values('post').annotate(last=Max('updated_at'))
+                    .values('last')
+                )
+            ).values(
+                'updated_at', 'comment_count', 'comment_modified',
+                'category__updated_at', 'location__updated_at'
+            ).get(id=self.kwargs['post_id'])
+        except Post.DoesNotExist:
+            return None
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (post_scope(self.kwargs['post_id']),)
+
     def get_queryset(self) -> QuerySet[Post]:
-        queryset = Post.objects.select_related('author', 'category',
-                                               'location').prefetch_related(
-            Prefetch('comments',
-                     queryset=Comment.objects.order_by('created_at'))
-        )
-        if self.request.user.is_authenticated:
-            return queryset.filter(
-                Q(is_published=True) | Q(author=self.request.user)
-            )
-        return queryset.filter(is_published=True, category__is_published=True)
+        return get_visible_post_queryset(self.request.user)
 
     def get_context_data(self, **kwargs) -> dict:
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments_page'] = get_comments_page(
+            self.object, self.request.GET.get('page'))
+        context['comments'] = context['comments_page'].object_list
         return context
 
     def get_object(self, queryset: Optional[QuerySet[Post]] = None) -> Post:
@@ -105,6 +324,31 @@ class PostDetailView(DetailView):
         return get_object_or_404(queryset, id=self.kwargs['post_id'])
 
 
+class PostCommentsView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                       DetailView):
+    """View фрагмента со следующей страницей комментариев поста."""
+
+    model: Type[Post] = Post
+    template_name: str = 'includes/comment_list.html'
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (post_scope(self.kwargs['post_id']),)
+
+    def get_queryset(self) -> QuerySet[Post]:
+        return get_visible_post_queryset(self.request.user).defer('text')
+
+    def get_object(self, queryset: Optional[QuerySet[Post]] = None) -> Post:
+        return get_object_or_404(
+            self.get_queryset(), id=self.kwargs['post_id'])
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = get_comments_page(
+            self.object, self.request.GET.get('page'))
+        context['comments'] = context['comments_page'].object_list
+        return context
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """View создания нового поста."""
 
@@ -114,7 +358,10 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form) -> HttpResponseRedirect:
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            enqueue_renditions(self.object)
+        return response
 
     def get_success_url(self) -> str:
         username: str = self.request.user.username
@@ -129,6 +376,12 @@ class PostEditView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     template_name: str = 'blog/create.html'
     pk_url_kwarg: str = 'post_id'
 
+    def form_valid(self, form) -> HttpResponseRedirect:
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            enqueue_renditions(self.object)
+        return response
+
     def get_success_url(self) -> str:
         return self.object.get_absolute_url()
 
@@ -158,8 +411,8 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     template_name: str = 'blog/comment.html'
 
     def get_queryset(self) -> QuerySet[Post]:
-        return get_counted_comments(get_post_queryset().select_related(
-            'author', 'category', 'location'))
+        return get_post_queryset().select_related(
+            'author', 'category', 'location').defer('text')
 
     def form_valid(self, form) -> HttpResponseRedirect:
         post = get_object_or_404(get_post_queryset(),
@@ -218,7 +471,9 @@ class UserEditProfileView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
-class ProfilePostsView(ListView):
+class ProfilePostsView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                       ConditionalGetMixin, PostCardsMixin,
+                       CursorPaginationMixin, ListView):
     """View отображения постов конкретного пользователя."""
 
     model: Type[Post] = User
@@ -226,23 +481,35 @@ class ProfilePostsView(ListView):
     ordering: str = '-pub_date'
     paginate_by: int = PAGINATE_BY
 
+    def get_validator(self) -> Optional[dict]:
+        profile = get_object_or_404(User, username=self.kwargs['username'])
+        validator = get_list_validator(
+            Post.objects.filter(author=profile), self.get_cache_scopes())
+        validator['profile'] = (
+            profile.get_full_name(), profile.is_staff, profile.date_joined)
+        return validator
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (author_scope(self.kwargs['username']),)
+
     def get_queryset(self) -> QuerySet[Post]:
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
-        return get_counted_comments(
-            Post.objects.filter(author=user).order_by('-pub_date')
+        self.profile = get_object_or_404(
+            User, username=self.kwargs['username']
         )
+        return Post.objects.filter(author=self.profile).select_related(
+            'author', 'category', 'location'
+        ).defer('text').order_by('-pub_date')
 
     def get_context_data(self, **kwargs) -> dict:
         context = super().get_context_data(**kwargs)
-        context['profile'] = get_object_or_404(
-            User, username=self.kwargs['username']
-        )
+        context['profile'] = self.profile
         return context
 
 
 # Category-related views
-class CategoryPostsView(ListView):
+class CategoryPostsView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                        ConditionalGetMixin, PostCardsMixin,
+                        CursorPaginationMixin, ListView):
     """View отображения постов конкретной категории."""
 
     model: Type[Post] = Post
@@ -250,13 +517,28 @@ class CategoryPostsView(ListView):
     template_name: str = 'blog/category.html'
     paginate_by: int = PAGINATE_BY
 
+    def get_validator(self) -> Optional[dict]:
+        category = Category.objects.filter(
+            slug=self.kwargs['category_slug'], is_published=True
+        ).values('pk', 'updated_at').first()
+        if category is None:
+            return None
+        validator = get_list_validator(
+            get_post_queryset().filter(category=category['pk']),
+            self.get_cache_scopes())
+        validator['category_modified'] = category['updated_at']
+        return validator
+
+    def get_cache_scopes(self) -> Tuple[str, ...]:
+        return (category_scope(self.kwargs['category_slug']),)
+
     def get_queryset(self) -> QuerySet[Post]:
         self.category = get_object_or_404(
             Category, slug=self.kwargs['category_slug'], is_published=True
         )
-        return get_counted_comments(get_post_queryset().filter(
+        return get_post_queryset().filter(
             category=self.category).select_related(
-                'author', 'location'))
+                'author', 'category', 'location').defer('text')
 
     def get_context_data(self, **kwargs) -> dict:
         context = super().get_context_data(**kwargs)
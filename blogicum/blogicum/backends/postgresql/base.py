@@ -0,0 +1,171 @@
+"""PostgreSQL с пулом соединений внутри процесса и проверкой живости.
+
+Настройки в DATABASES:
+
+* OPTIONS['pool'] = {'min_size': ..., 'max_size': ..., 'timeout': ...} —
+  соединения берутся из общего для процесса пула и возвращаются в него
+  при close(), а не закрываются; нужен потокам image_worker и
+  многопоточному WSGI. Когда все max_size соединений заняты, поток ждёт
+  освободившееся до timeout секунд (по умолчанию 30), затем получает
+  OperationalError;
+* CONN_HEALTH_CHECKS = True — переиспользуемое соединение проверяется
+  перед первым запросом каждого HTTP-запроса (аналог настройки из
+  Django 4.1, которой нет в 3.2).
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base, creation
+from psycopg2.pool import ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """Пул, создающий соединения через Django, а не psycopg2.connect().
+
+    Так новые соединения получают те же настройки сессии, что и
+    соединения без пула. В отличие от ThreadedConnectionPool, при
+    исчерпании пула getconn() ждёт, а не сразу падает с PoolError.
+    """
+
+    def __init__(self, min_size: int, max_size: int, timeout: float,
+                 connect):
+        self.connect_new = connect
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_size)
+        super().__init__(min_size, max_size)
+
+    def _connect(self, key=None):
+        connection = self.connect_new()
+        if key is not None:
+            self._used[key] = connection
+            self._rused[id(connection)] = key
+        else:
+            self._pool.append(connection)
+        return connection
+
+    def getconn(self, key=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise base.Database.OperationalError(
+                f'Все {self.maxconn} соединений пула заняты дольше '
+                f'{self.timeout} с.')
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self.slots.release()
+
+
+def close_pools(alias: str) -> None:
+    """Закрывает пулы псевдонима alias в текущем процессе."""
+    pid = os.getpid()
+    with _pools_lock:
+        for key in [key for key in _pools if key[:2] == (pid, alias)]:
+            _pools.pop(key).closeall()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Простаивающие в пуле соединения с тестовой базой не дают
+        # выполнить DROP DATABASE.
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    health_check_done = False
+
+    @property
+    def pool_options(self):
+        return self.settings_dict['OPTIONS'].get('pool')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_pool(self, conn_params: dict) -> ConnectionPool:
+        # Ключ включает pid: после fork соединения родителя использовать
+        # нельзя, у каждого процесса свой пул. Параметры соединения тоже
+        # входят в ключ: под тем же псевдонимом Django подключается и к
+        # служебной базе postgres (создание тестовой базы, _nodb_cursor).
+        key = (os.getpid(), self.alias, repr(sorted(conn_params.items())))
+        with _pools_lock:
+            if key not in _pools:
+                options = self.pool_options
+                _pools[key] = ConnectionPool(
+                    options.get('min_size', 1), options.get('max_size', 10),
+                    options.get('timeout', 30),
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        conn_params))
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+        pool = self.get_pool(conn_params)
+        connection = pool.getconn()
+        while connection.closed or not self.connection_is_usable(connection):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        # close() возвращает соединение в тот пул, из которого оно взято.
+        self.connection_pool = pool
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def connection_is_usable(self, connection) -> bool:
+        if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                # SELECT открыл транзакцию, а connect() дальше вызовет
+                # set_autocommit(), который внутри транзакции запрещён.
+                connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None or not self.pool_options:
+            return super()._close()
+        # putconn() откатывает незавершённую транзакцию; сломанное
+        # соединение закрывается, а не возвращается в пул.
+        broken = self.connection.closed or self.errors_occurred
+        with self.wrap_database_errors:
+            self.connection_pool.putconn(self.connection, close=broken)
+
+    def connect(self):
+        super().connect()
+        # Только что открытое соединение проверять незачем.
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается на request_started и request_finished: следующий
+        # запрос проверит соединение заново.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None
+                or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,191 @@
+"""Отдача загруженных файлов из MEDIA_ROOT.
+
+Режим задаётся настройкой MEDIA_SERVE_MODE:
+
+* 'django' — файл отдаёт сам Django: с ETag, долгим Cache-Control и
+  поддержкой запросов диапазонов (Range);
+* 'x-accel' — Django только проверяет путь и передаёт отдачу nginx
+  заголовком X-Accel-Redirect (internal location MEDIA_ACCEL_PREFIX);
+* 'x-sendfile' — то же для Apache/lighttpd через X-Sendfile.
+
+За прокси все запросы приходят к Django с 127.0.0.1, поэтому в его
+конфигурации /metrics нужно закрыть (для nginx — location = /metrics
+{ deny all; }) или задать METRICS_TOKEN, см. blogicum.metrics.
+
+Файл отдаётся, только если он — изображение или его уменьшенная копия
+у поста, страница которого доступна запрашивающему (как на странице
+поста), либо запрос делает сотрудник. Долгий публичный Cache-Control
+получают лишь файлы постов, открытых всем; файлы черновиков видит
+только автор, и кешировать их можно только в браузере.
+"""
+import mimetypes
+import os
+import re
+import stat
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import (
+    FileResponse, Http404, HttpRequest, HttpResponse
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from blog.models import Post, PostFile
+from blog.views import get_visible_post_queryset
+
+# Имена загрузок — хеши содержимого, поэтому файл по одному адресу не
+# меняется и его можно кешировать «навсегда».
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Файлы постов, доступных не всем, не должны оседать в общих кешах.
+PRIVATE_MEDIA_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileRange:
+    """Файл, читаемый FileResponse только в пределах диапазона."""
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Разбирает Range на (начало, конец включительно).
+
+    Возвращает None, если заголовок не поддерживается (например, несколько
+    диапазонов) — тогда отдаётся весь файл. Для невыполнимого диапазона
+    возбуждает ValueError.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _range_is_fresh(request: HttpRequest, etag: str, mtime: int) -> bool:
+    # If-Range: диапазон отдаётся, только если файл не изменился.
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def media_cache_control(request: HttpRequest, name: str) -> str:
+    """Cache-Control для файла поста; Http404, если файл недоступен.
+
+    Владельцы файла ищутся по индексу PostFile, а посты — по первичному
+    ключу. Файлы, не принадлежащие ни одному посту, не отдаются вовсе.
+    """
+    belongs = Q(pk__in=PostFile.objects.filter(name=name).values('post'))
+    if get_visible_post_queryset(AnonymousUser()).filter(belongs).exists():
+        return MEDIA_CACHE_CONTROL
+    if request.user.is_staff:
+        queryset = Post.objects.all()
+    elif request.user.is_authenticated:
+        queryset = get_visible_post_queryset(request.user)
+    else:
+        raise Http404
+    if not queryset.filter(belongs).exists():
+        raise Http404
+    return PRIVATE_MEDIA_CACHE_CONTROL
+
+
+def _accel_response(name: str, header: str, value: str,
+                    cache_control: str) -> HttpResponse:
+    content_type, _ = mimetypes.guess_type(name)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream')
+    response[header] = value
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    cache_control = media_cache_control(request, path)
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == 'x-accel':
+        return _accel_response(
+            path, 'X-Accel-Redirect',
+            settings.MEDIA_ACCEL_PREFIX + quote(path), cache_control)
+    if mode == 'x-sendfile':
+        return _accel_response(
+            path, 'X-Sendfile', full_path, cache_control)
+    return _file_response(request, full_path, cache_control)
+
+
+def _file_response(request: HttpRequest, full_path: str,
+                   cache_control: str) -> HttpResponse:
+    try:
+        file_stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+    size, mtime = file_stat.st_size, int(file_stat.st_mtime)
+    etag = quote_etag(f'{size:x}-{file_stat.st_mtime_ns:x}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=mtime)
+    if response is not None:
+        response['Cache-Control'] = cache_control
+        return response
+
+    byte_range = None
+    if 'Range' in request.headers and _range_is_fresh(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        _FileRange(open(full_path, 'rb'), start, length),
+        status=206 if byte_range else 200,
+        content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = length
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,306 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти (одна короткая
+блокировка на запрос) и не чаще раза в METRICS_FLUSH_INTERVAL секунд
+сбрасывает их в свой файл METRICS_DIR/<pid>-<метка запуска>.json: pid
+может достаться новому воркеру, и тот не должен затереть итоги прежнего.
+Эндпоинт /metrics складывает файлы всех процессов, поэтому показывает
+сумму по всем воркерам. Файлы завершившихся процессов при чтении
+переносятся в общий METRICS_DIR/archive.json, так что каталог не растёт,
+а счётчики не убывают. Каталог — свой для каждого сервера: живость
+процессов проверяется по pid; его стоит очищать при развёртывании,
+Prometheus воспримет это как обычный перезапуск счётчиков.
+"""
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'blogicum_http_request_duration_seconds': (
+        'Время обработки запроса.', DURATION_BUCKETS),
+    'blogicum_http_response_size_bytes': (
+        'Размер тела ответа.', SIZE_BUCKETS),
+    'blogicum_db_queries_per_request': (
+        'Число SQL-запросов за один HTTP-запрос.', QUERY_COUNT_BUCKETS),
+    'blogicum_db_duration_seconds': (
+        'Время SQL-запросов за один HTTP-запрос.', DURATION_BUCKETS),
+}
+COUNTERS = {
+    'blogicum_http_requests_total': 'Число обработанных запросов.',
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+PROCESS_FILE_RE = re.compile(r'^(\d+)(?:-\w+)?\.json$')
+
+
+class Registry:
+    """Счётчики и гистограммы одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        # [счётчики по корзинам..., сумма, количество]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self.flushed_at = 0.0
+        self.pid = None
+        self.filename = None
+
+    def inc(self, name: str, labels: dict, value: float = 1) -> None:
+        with self.lock:
+            self.counters[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name: str, labels: dict, value: float) -> None:
+        buckets = HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, dict(labels), list(series)]
+                    for (name, labels), series in self.histograms.items()],
+            }
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if not force and now - self.flushed_at < interval:
+            return
+        self.flushed_at = now
+        if self.pid != os.getpid():
+            # Первый сброс в этом процессе, в том числе после fork.
+            self.pid = os.getpid()
+            self.filename = f'{self.pid}-{uuid.uuid4().hex[:8]}.json'
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, self.filename), self.snapshot())
+
+
+def _write_json(path: str, data: dict) -> None:
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix='.part')
+    with os.fdopen(fd, 'w') as temp:
+        json.dump(data, temp)
+    os.replace(temp_path, path)
+
+
+registry = Registry()
+
+
+def observe_request(view: str, method: str, status: int, seconds: float,
+                    size: int, db_queries: int, db_seconds: float) -> None:
+    labels = {'view': view}
+    registry.inc('blogicum_http_requests_total',
+                 {'view': view, 'method': method, 'status': str(status)})
+    registry.observe('blogicum_http_request_duration_seconds', labels,
+                     seconds)
+    registry.observe('blogicum_http_response_size_bytes', labels, size)
+    registry.observe('blogicum_db_queries_per_request', labels, db_queries)
+    registry.observe('blogicum_db_duration_seconds', labels, db_seconds)
+    registry.flush()
+
+
+def _add_snapshot(collected: dict, snapshot: dict) -> None:
+    for name, labels, value in snapshot['counters']:
+        collected['counters'][name, tuple(sorted(labels.items()))] += value
+    histograms = collected['histograms']
+    for name, labels, series in snapshot['histograms']:
+        key = (name, tuple(sorted(labels.items())))
+        if key in histograms:
+            histograms[key] = [
+                total + part for total, part in zip(histograms[key], series)]
+        else:
+            histograms[key] = list(series)
+
+
+def _read_snapshot(path: str):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    with open(os.path.join(directory, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def archive_dead_processes(directory: str) -> int:
+    """Переносит файлы завершившихся процессов в archive.json.
+
+    Возвращает число перенесённых файлов. Блокировка не даёт двум
+    одновременным чтениям /metrics учесть один файл дважды.
+    """
+    with _directory_lock(directory):
+        dead = []
+        for filename in os.listdir(directory):
+            match = PROCESS_FILE_RE.match(filename)
+            if match and not _process_alive(int(match.group(1))):
+                dead.append(os.path.join(directory, filename))
+        if not dead:
+            return 0
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = {'counters': defaultdict(float), 'histograms': {}}
+        for path in [archive_path] + dead:
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                _add_snapshot(archive, snapshot)
+        _write_json(archive_path, {
+            'counters': [
+                [name, dict(labels), value]
+                for (name, labels), value in archive['counters'].items()],
+            'histograms': [
+                [name, dict(labels), series]
+                for (name, labels), series in archive['histograms'].items()],
+        })
+        for path in dead:
+            os.remove(path)
+        return len(dead)
+
+
+def collect() -> dict:
+    """Складывает снимки всех процессов из METRICS_DIR."""
+    registry.flush(force=True)
+    directory = settings.METRICS_DIR
+    archive_dead_processes(directory)
+    collected = {'counters': defaultdict(float), 'histograms': {}}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        snapshot = _read_snapshot(os.path.join(directory, filename))
+        if snapshot is not None:
+            _add_snapshot(collected, snapshot)
+    return collected
+
+
+def _escape(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in labels + extra)
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _histogram_lines(name: str, buckets: tuple, labels: Labels,
+                     series: List[float]) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets, series):
+        cumulative += count
+        bucket_labels = _labels(labels, (('le', repr(float(bound))),))
+        lines.append(f'{name}_bucket{bucket_labels} {_number(cumulative)}')
+    count = _number(series[-1])
+    lines += [
+        f'{name}_bucket{_labels(labels, (("le", "+Inf"),))} {count}',
+        f'{name}_sum{_labels(labels)} {_number(series[-2])}',
+        f'{name}_count{_labels(labels)} {count}',
+    ]
+    return lines
+
+
+def render(collected: dict) -> str:
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (series_name, labels), value in sorted(
+                collected['counters'].items()):
+            if series_name == name:
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (series_name, labels), series in sorted(
+                collected['histograms'].items()):
+            if series_name == name:
+                lines += _histogram_lines(name, buckets, labels, series)
+    return '\n'.join(lines) + '\n'
+
+
+# Заголовки, которые ставит обратный прокси: за ним (nginx с X-Accel для
+# медиа) любой внешний запрос приходит с 127.0.0.1, и такой запрос не
+# должен считаться локальным.
+PROXY_HEADERS = ('HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP', 'HTTP_FORWARDED')
+
+
+def metrics_allowed(request: HttpRequest) -> bool:
+    """Доступ к /metrics: локальный адрес без следов прокси и токен.
+
+    Если задан METRICS_TOKEN, он должен прийти в заголовке
+    Authorization: Bearer <токен> (bearer_token в конфигурации Prometheus).
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return False
+    if any(header in request.META for header in PROXY_HEADERS):
+        return False
+    if not settings.METRICS_TOKEN:
+        return True
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    return scheme.lower() == 'bearer' and constant_time_compare(
+        token, settings.METRICS_TOKEN)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    # Эндпоинт для Prometheus, снаружи его не видно.
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        render(collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,142 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+from blogicum.metrics import observe_request
+from blogicum.routers import use_replica
+from blogicum.slow_queries import slow_query_log
+from blogicum.timing import RequestTiming, current_timing
+
+timing_logger = logging.getLogger('blogicum.timing')
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтение публичных страниц в реплики.
+
+    Включается для GET/HEAD-запросов к представлениям с атрибутом
+    replica_reads. После успешного изменяющего запроса пользователь
+    получает cookie REPLICA_STICKY_COOKIE и следующие
+    REPLICA_STICKY_SECONDS секунд читает из основной базы — так автор
+    сразу видит свой пост или комментарий, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.replica_token is not None:
+                use_replica.reset(request.replica_token)
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in SAFE_METHODS
+                and getattr(view_class, 'replica_reads', False)
+                and settings.REPLICA_STICKY_COOKIE not in request.COOKIES):
+            request.replica_token = use_replica.set(True)
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса для эндпоинта /metrics.
+
+    Метка view — имя маршрута (blog:index, blog:post_detail, ...);
+    запросы без маршрута попадают в 'unmatched', чтобы произвольные
+    адреса не плодили новые ряды.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        with timing.measure_queries():
+            response = self.get_response(request)
+        match = request.resolver_match
+        if response.has_header('Content-Length'):
+            size = int(response['Content-Length'])
+        else:
+            size = 0 if response.streaming else len(response.content)
+        observe_request(
+            view=match.view_name if match else 'unmatched',
+            method=request.method, status=response.status_code,
+            seconds=timing.total_seconds(), size=size,
+            db_queries=timing.db_queries, db_seconds=timing.db_seconds)
+        return response
+
+
+class ServerTimingMiddleware:
+    """Разбивка времени запроса: база, шаблоны, кеш страниц, итог.
+
+    Замеряется доля запросов SERVER_TIMING_SAMPLE_RATE; для них ответ
+    получает заголовок Server-Timing (виден во вкладке Network браузера),
+    а в лог blogicum.timing пишется строка JSON с теми же значениями.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            with timing.measure_queries():
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        self.report(request, response, timing)
+        return response
+
+    def report(self, request, response, timing: RequestTiming):
+        total_ms = timing.total_seconds() * 1000
+        db_ms = timing.db_seconds * 1000
+        template_ms = timing.template_seconds * 1000
+        page_cache = response.get('X-Page-Cache')
+        metrics = [
+            f'db;dur={db_ms:.1f};desc="{timing.db_queries} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ]
+        if page_cache:
+            metrics.append(f'cache;desc="{page_cache}"')
+        if response.has_header('Server-Timing'):
+            metrics.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(metrics)
+        match = request.resolver_match
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(db_ms, 1),
+            'db_queries': timing.db_queries,
+            'template_ms': round(template_ms, 1),
+            'page_cache': page_cache,
+        }))
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал медленные SQL-запросы запроса (см. slow_queries)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_query_log.watch(request):
+            return self.get_response(request)
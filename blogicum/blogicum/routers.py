@@ -0,0 +1,66 @@
+"""Маршрутизация запросов к базе между основной базой и репликами.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Чтение идёт в реплику
+только внутри read_from_replica() — его включает ReplicaRoutingMiddleware
+для GET-запросов к представлениям с replica_reads = True. Всё остальное,
+включая любые записи и админку, работает с основной базой. Внутри
+read_from_primary() чтение снова идёт в основную базу: так читают
+запросы, результат которых попадёт в кеш, — отставшая реплика
+закешировала бы устаревшую страницу под уже новым ключом.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def _reading_replica(value: bool):
+    token = use_replica.set(value)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+def read_from_replica():
+    return _reading_replica(True)
+
+
+def read_from_primary():
+    return _reading_replica(False)
+
+
+class ReplicaRouter:
+    """Роутер: чтение из случайной реплики, запись в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return None
+        # Внутри транзакции читаем то, что в ней же записали.
+        if (not use_replica.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Без реплик решает Django: например, объекты, созданные через
+        # using(), пишутся в свою базу.
+        if not settings.DATABASE_REPLICAS:
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит из основной базы вместе с данными.
+        return db not in settings.DATABASE_REPLICAS
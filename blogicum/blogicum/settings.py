@@ -1,5 +1,9 @@
+import os
+import tempfile
 from pathlib import Path
 
+from blogicum.database import database_config, replica_databases
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -32,16 +36,74 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.middleware.MetricsMiddleware',
+    'blogicum.middleware.ServerTimingMiddleware',
+    'blogicum.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'blogicum.middleware.ReplicaRoutingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Доля запросов, для которых ServerTimingMiddleware замеряет время и
+# отдаёт заголовок Server-Timing.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.getenv('SERVER_TIMING_SAMPLE_RATE', 0.01))
+
+# Замеры ServerTimingMiddleware пишутся строками JSON без префиксов,
+# чтобы их можно было сразу разбирать сборщиком логов; ход массовых
+# действий админки (blog.bulk) — обычными строками с временем.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(message)s'},
+        'plain': {'format': '%(asctime)s %(name)s %(levelname)s %(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json_line',
+        },
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'blogicum.timing': {
+            'handlers': ['timing'],
+            'level': os.getenv('TIMING_LOG_LEVEL', 'INFO'),
+        },
+        'blog.bulk': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Файлы метрик процессов (blogicum/metrics.py) и адреса, с которых
+# доступен /metrics. Запросы через прокси (X-Forwarded-For, X-Real-IP)
+# отклоняются; если задан METRICS_TOKEN, Prometheus должен передавать его
+# в заголовке Authorization: Bearer.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'blogicum-metrics'))
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Журнал SQL-запросов дольше порога (blogicum/slow_queries.py), сводка —
+# команда slow_query_report.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG',
+    os.path.join(tempfile.gettempdir(), 'blogicum-slow-queries.jsonl'))
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -52,7 +114,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blogicum.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,12 +131,66 @@ TEMPLATES = [
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 
+# SQLite по умолчанию; PostgreSQL и параметры соединений задаются
+# переменными окружения, см. blogicum/database.py.
 DATABASES = {
+    'default': database_config(os.environ, BASE_DIR),
+    **replica_databases(os.environ, BASE_DIR),
+}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['blogicum.routers.ReplicaRouter']
+
+# После изменяющего запроса пользователь столько секунд читает из основной
+# базы, чтобы не увидеть отстающую реплику.
+REPLICA_STICKY_COOKIE = 'use_primary'
+REPLICA_STICKY_SECONDS = 10
+
+# Профиль SQLite: 'production' — WAL и настройки ниже применяются к каждому
+# новому соединению (blog/db.py), 'stock' — настройки SQLite по умолчанию.
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production')
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    # Читатели не ждут писателей, писатель не ждёт читателей.
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    # В режиме WAL NORMAL не теряет целостность, fsync — на checkpoint.
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    # Сколько миллисекунд ждать блокировку вместо "database is locked".
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Отрицательное значение — размер кеша страниц в КиБ.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'memory'),
+}
+
+SQLITE_PRAGMAS = (
+    SQLITE_PRODUCTION_PRAGMAS if SQLITE_PROFILE == 'production' else {})
+
+# Кеш общий для всех процессов: поколения кеша страниц, сами страницы и
+# счётчики page_cache_stats должны быть видны каждому воркеру и командам
+# manage.py. По умолчанию — файлы в CACHE_LOCATION на этом сервере; для
+# нескольких серверов — memcached (CACHE_LOCATION=host:port), где incr
+# атомарен. LocMemCache живёт внутри одного процесса: только для тестов.
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'blogicum-cache')),
     }
 }
+if CACHE_BACKEND == 'file':
+    # Файловый кеш при переполнении удаляет треть записей, в том числе
+    # поколения и счётчики; держим запас.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,3 +234,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Кто отдаёт файлы из MEDIA_ROOT: 'django' — сам Django (по умолчанию,
+# для запуска без прокси), 'x-accel' — nginx по X-Accel-Redirect,
+# 'x-sendfile' — веб-сервер по X-Sendfile. См. blogicum/media.py.
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'django')
+
+# internal location nginx, указывающая на MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Загрузки называются по хешу содержимого: одинаковые файлы хранятся один
+# раз. Файлы без ссылок удаляет manage.py gc_media.
+DEFAULT_FILE_STORAGE = 'blog.storage.HashedFileSystemStorage'
@@ -0,0 +1,150 @@
+"""Журнал медленных SQL-запросов.
+
+SlowQueryMiddleware подключает к базам execute_wrapper: запрос дольше
+SLOW_QUERY_THRESHOLD_MS записывается строкой JSON в SLOW_QUERY_LOG вместе
+с представлением, строкой кода проекта, откуда он выполнен, и отпечатком
+(нормализованным текстом). Текст, параметры и план выполнения (EXPLAIN
+или EXPLAIN QUERY PLAN на SQLite) пишутся только при первой встрече
+отпечатка в процессе — повторы несут лишь отпечаток и длительность.
+Сводку по журналу строит команда slow_query_report.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_RE = re.compile(r"%s")
+IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Отпечаток запроса: литералы заменены на ?, списки IN — на (...)."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:16]
+
+
+# Кадры пакета blogicum (middleware, замеры времени) — это обвязка, а не
+# код, выполнивший запрос.
+PACKAGE_DIR = os.path.dirname(__file__)
+
+
+def _origin() -> Optional[str]:
+    """Ближайшая к запросу строка кода приложений проекта."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(base_dir)
+                and not frame.filename.startswith(PACKAGE_DIR)
+                and 'site-packages' not in frame.filename):
+            path = os.path.relpath(frame.filename, base_dir)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def explain(connection, sql: str, params) -> Optional[list]:
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    sqlite = connection.vendor == 'sqlite'
+    prefix = 'EXPLAIN QUERY PLAN' if sqlite else 'EXPLAIN'
+    try:
+        # Ошибка EXPLAIN откатывает только точку сохранения, а не
+        # транзакцию, в которой выполнялся сам запрос.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                # В EXPLAIN QUERY PLAN описание шага — последний столбец.
+                return [
+                    str(row[-1]) if sqlite else ' '.join(map(str, row))
+                    for row in cursor.fetchall()]
+    except DatabaseError:
+        return None
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.local = threading.local()
+
+    def write(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        with self.lock:
+            with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as log:
+                log.write(line)
+
+    def record(self, connection, sql, params, seconds, view) -> None:
+        key = fingerprint(sql)
+        entry = {
+            'time': time.time(),
+            'fingerprint': key,
+            'duration_ms': round(seconds * 1000, 2),
+            'database': connection.alias,
+            'view': view,
+            'origin': _origin(),
+        }
+        with self.lock:
+            first = key not in self.seen
+            self.seen.add(key)
+        if first:
+            # План запрашивается на том же соединении; собственные
+            # запросы EXPLAIN в журнал не попадают.
+            self.local.explaining = True
+            try:
+                plan = explain(connection, sql, params)
+            finally:
+                self.local.explaining = False
+            entry.update(
+                sql=normalize_sql(sql), raw_sql=sql,
+                params=(
+                    params if isinstance(params, dict)
+                    else list(params or ())),
+                plan=plan)
+        self.write(entry)
+
+    @contextmanager
+    def watch(self, request=None):
+        """Записывает медленные запросы, выполненные внутри блока.
+
+        Представление берётся из request.resolver_match в момент запроса:
+        маршрут определяется уже после входа в middleware.
+        """
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+        def wrapper(execute, sql, params, many, context):
+            if many or getattr(self.local, 'explaining', False):
+                return execute(sql, params, many, context)
+            started = time.perf_counter()
+            result = execute(sql, params, many, context)
+            elapsed = time.perf_counter() - started
+            if elapsed >= threshold:
+                match = getattr(request, 'resolver_match', None)
+                self.record(
+                    context['connection'], sql, params, elapsed,
+                    match.view_name if match else None)
+            return result
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper))
+            yield
+
+
+slow_query_log = SlowQueryLog()
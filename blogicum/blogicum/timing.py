@@ -0,0 +1,77 @@
+"""Замеры времени внутри одного запроса.
+
+ServerTimingMiddleware создаёт RequestTiming для выбранных запросов и
+кладёт его в контекстную переменную; время SQL-запросов копит
+execute_wrapper, время шаблонов — бэкенд TimedDjangoTemplates.
+Для запросов без замера всё сводится к одной проверке переменной.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+current_timing: ContextVar[Optional['RequestTiming']] = ContextVar(
+    'current_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    @contextmanager
+    def measure_queries(self):
+        """Подключает execute_wrapper ко всем базам, включая реплики."""
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(self.execute_wrapper))
+            yield
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        timing = current_timing.get()
+        if timing is None:
+            return super().render(context, request)
+        # Вложенные render() (render_to_string внутри тегов) уже входят во
+        # время внешнего шаблона.
+        timing.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(django_backend.DjangoTemplates):
+    """Бэкенд DjangoTemplates, учитывающий время отрисовки шаблонов."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -3,7 +3,9 @@ from django.urls import include, path, reverse_lazy
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from blogicum.media import serve_media
+from blogicum.metrics import metrics_view
 
 urlpatterns = [
     path('', include('blog.urls', namespace='blog')),
@@ -19,7 +21,10 @@ urlpatterns = [
         ),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metrics_view, name='metrics'),
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', serve_media,
+         name='media'),
+]
 
 if settings.DEBUG:
     import debug_toolbar
@@ -0,0 +1,15 @@
+'use strict';
+// Фильтр списка в админке с автодополнением: выбор значения
+// перезагружает список с параметром фильтра.
+django.jQuery(function($) {
+  $('.autocomplete-filter select').on('change', function() {
+    var box = $(this).closest('.autocomplete-filter');
+    var url = box.data('clearUrl');
+    if (this.value) {
+      url += (url.indexOf('?') === -1 ? '?' : '&') +
+        encodeURIComponent(box.data('param')) + '=' +
+        encodeURIComponent(this.value);
+    }
+    window.location = url;
+  });
+});
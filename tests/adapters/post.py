@@ -33,6 +33,10 @@ class PostModelAdapter(StudentModelAdapter):
             "author",
             "category",
             "location",
+            "comment_count",
+            "published_comment_count",
+            "updated_at",
+            "image_renditions",
             "refresh_from_db",
         ]
 
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,28 @@ def enable_debug_false():
         yield
 
 
+# Общий файловый кеш из настроек тестам не нужен: каждый тест получает
+# пустой кеш в памяти процесса.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    # MetricsMiddleware сбрасывает метрики на диск при каждом запросе.
+    settings.METRICS_DIR = str(tmp_path / "metrics")
+    return settings.METRICS_DIR
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    with override_settings(CACHES=TEST_CACHES):
+        cache.clear()
+        yield
+        cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -92,6 +115,7 @@ pytest_plugins = [
     "fixtures.locations",
     "fixtures.categories",
     "fixtures.comments",
+    "fixtures.queries",
     "adapters.comment",
 ]
 
@@ -21,6 +21,18 @@ from conftest import (
 )
 
 
+@pytest.fixture
+def published_post(mixer: Mixer, user: Model, published_category):
+    """Опубликованный вчера пост, видимый на всех страницах блога."""
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
 @pytest.fixture
 def posts_with_unpublished_category(mixer: Mixer, user: Model):
     return mixer.cycle(N_PER_FIXTURE).blend(
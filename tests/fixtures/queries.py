@@ -0,0 +1,77 @@
+"""Бюджеты запросов к базе и поиск N+1 для запросов тестового клиента.
+
+Фикстура query_budgets перехватывает все запросы django.test.Client
+в тесте: для каждого ответа собираются SQL-запросы, их число сверяется
+с бюджетом из blog.urls.QUERY_BUDGETS (по имени маршрута), а
+повторяющиеся с точностью до параметров запросы считаются признаком N+1.
+"""
+from collections import Counter
+from typing import Dict, List
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404
+
+from blog.urls import QUERY_BUDGETS, app_name
+from blogicum.slow_queries import normalize_sql
+
+# Столько одинаковых с точностью до параметров запросов за один HTTP-запрос
+# уже считается N+1.
+N_PLUS_ONE_REPEATS = 3
+
+
+def repeated_queries(queries: List[str]) -> Dict[str, int]:
+    counts = Counter(normalize_sql(sql) for sql in queries)
+    return {
+        sql: count for sql, count in counts.items()
+        if count >= N_PLUS_ONE_REPEATS
+    }
+
+
+def budget_for(view_name: str):
+    namespace, _, name = view_name.rpartition(":")
+    if namespace != app_name:
+        return None
+    return QUERY_BUDGETS.get(name)
+
+
+def check_queries(method: str, path: str, view_name: str,
+                  queries: List[str]) -> None:
+    repeated = repeated_queries(queries)
+    assert not repeated, (
+        f"Запрос {method} `{path}` выполняет повторяющиеся SQL-запросы"
+        f" (N+1): {repeated}"
+    )
+    budget = budget_for(view_name)
+    if budget is None:
+        return
+    assert len(queries) <= budget, (
+        f"Запрос {method} `{path}` ({view_name}) выполнил {len(queries)}"
+        f" SQL-запросов при бюджете {budget}:\n" + "\n".join(queries)
+    )
+
+
+@pytest.fixture
+def query_budgets(monkeypatch):
+    """Проверяет каждый запрос тестового клиента; отдаёт журнал проверок."""
+    checked = []
+    request = Client.request
+
+    def request_with_budget(self, **request_kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = request(self, **request_kwargs)
+        try:
+            view_name = response.resolver_match.view_name
+        except Resolver404:
+            return response
+        queries = [query["sql"] for query in ctx.captured_queries]
+        check_queries(
+            request_kwargs.get("REQUEST_METHOD", "GET"),
+            request_kwargs.get("PATH_INFO", ""), view_name, queries)
+        checked.append((view_name, len(queries)))
+        return response
+
+    monkeypatch.setattr(Client, "request", request_with_budget)
+    return checked
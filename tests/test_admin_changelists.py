@@ -0,0 +1,126 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.constants import ADMIN_INLINE_COMMENTS
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(admin_client, url: str, **params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.get(url, params)
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+def blend_posts(mixer: Mixer, n: int, user):
+    categories = mixer.cycle(3).blend("blog.Category")
+    locations = mixer.cycle(3).blend("blog.Location")
+    return mixer.cycle(n).blend(
+        "blog.Post", author=user,
+        category=mixer.sequence(*categories),
+        location=mixer.sequence(*locations),
+    )
+
+
+def test_post_changelist_query_count_does_not_depend_on_rows(
+        mixer: Mixer, admin_client, user
+):
+    blend_posts(mixer, 3, user)
+    _, small = count_queries(admin_client, "/admin/blog/post/")
+    blend_posts(mixer, 20, user)
+    response, large = count_queries(admin_client, "/admin/blog/post/")
+
+    assert len(response.context["cl"].result_list) == 23
+    assert small == large, (
+        "Количество запросов списка постов в админке не должно зависеть от"
+        " числа строк: варианты категорий и местоположений должны"
+        " читаться один раз на страницу."
+    )
+
+
+def test_comment_filters_do_not_list_all_posts(
+        mixer: Mixer, admin_client, user
+):
+    posts = mixer.cycle(5).blend("blog.Post", author=user,
+                                 title=mixer.sequence("Пост {0}"))
+    mixer.cycle(5).blend("blog.Comment", post=mixer.sequence(*posts),
+                         author=user)
+    _, small = count_queries(admin_client, "/admin/blog/comment/")
+    more_posts = mixer.cycle(20).blend("blog.Post", author=user)
+    mixer.cycle(20).blend("blog.Comment", post=mixer.sequence(*more_posts),
+                          author=user)
+    response, large = count_queries(admin_client, "/admin/blog/comment/")
+    assert small == large, (
+        "Фильтры списка комментариев не должны выводить все посты и всех"
+        " пользователей."
+    )
+    content = response.content.decode()
+    assert f'<option value="{posts[0].pk}"' not in content
+    assert "admin-autocomplete" in content
+
+    selected = posts[1]
+    response, _ = count_queries(
+        admin_client, "/admin/blog/comment/", post__id__exact=selected.pk)
+    assert {comment.post_id for comment in response.context["cl"].result_list
+            } == {selected.pk}
+    assert selected.title in response.content.decode(), (
+        "В фильтре должен отображаться выбранный пост."
+    )
+
+
+def form_data(form) -> dict:
+    data = {}
+    for name in form.fields:
+        value = form[name].value()
+        if value is None or name in ("image",):
+            continue
+        if isinstance(value, bool):
+            if value:
+                data[form.add_prefix(name)] = "on"
+            continue
+        data[form.add_prefix(name)] = value
+    return data
+
+
+def test_post_change_page_caps_comment_inline(
+        mixer: Mixer, admin_client, user
+):
+    post = mixer.blend("blog.Post", author=user)
+    mixer.cycle(ADMIN_INLINE_COMMENTS + 15).blend(
+        "blog.Comment", post=post, author=user)
+    url = f"/admin/blog/post/{post.pk}/change/"
+    admin_client.get(url)
+
+    _, few_extra = count_queries(admin_client, url)
+    mixer.cycle(30).blend("blog.Comment", post=post, author=user)
+    response, many_extra = count_queries(admin_client, url)
+
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert formset.initial_form_count() == ADMIN_INLINE_COMMENTS
+    assert few_extra == many_extra, (
+        "Страница поста в админке должна выводить ограниченное число"
+        " комментариев."
+    )
+    assert f"/admin/blog/comment/?post__id__exact={post.pk}" in (
+        response.content.decode()
+    )
+
+    data = form_data(response.context["adminform"].form)
+    pub_date = data.pop("pub_date")
+    data["pub_date_0"] = pub_date.strftime("%Y-%m-%d")
+    data["pub_date_1"] = pub_date.strftime("%H:%M:%S")
+    management = formset.management_form
+    for name in management.fields:
+        data[management.add_prefix(name)] = management[name].value()
+    for form in formset.initial_forms:
+        data.update(form_data(form))
+    first = formset.initial_forms[0]
+    data[first.add_prefix("text")] = "Исправлено модератором"
+
+    response = admin_client.post(url, data)
+    assert response.status_code == 302
+    first.instance.refresh_from_db()
+    assert first.instance.text == "Исправлено модератором"
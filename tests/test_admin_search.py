@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from mixer.backend.django import Mixer
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Полнотекстовый поиск в админке работает на SQLite.",
+    ),
+]
+
+
+def changelist(admin_client, model: str, query: str):
+    response = admin_client.get(f"/admin/blog/{model}/", {"q": query})
+    assert response.status_code == 200
+    return response.context["cl"]
+
+
+def test_post_admin_searches_title_and_text(
+        mixer: Mixer, admin_client, user
+):
+    by_title = mixer.blend("blog.Post", author=user, title="Про кактусы")
+    by_text = mixer.blend("blog.Post", author=user, title="Заметка",
+                          text="Полив кактусов зимой.")
+    mixer.blend("blog.Post", author=user, title="Другое", text="Другое.")
+
+    cl = changelist(admin_client, "post", "кактус")
+
+    assert set(cl.result_list) == {by_title, by_text}
+    assert cl.show_full_result_count is False, (
+        "При поиске в админке не нужно считать общее число записей."
+    )
+
+
+def test_comment_admin_searches_text_and_author_prefix(
+        mixer: Mixer, admin_client, user, another_user
+):
+    another_user.username = "moderator_anna"
+    another_user.save()
+    post = mixer.blend("blog.Post", author=user)
+    by_text = mixer.blend("blog.Comment", post=post, author=user,
+                          text="Отличный moderator разбор")
+    by_author = mixer.blend("blog.Comment", post=post, author=another_user,
+                            text="Спасибо")
+    mixer.blend("blog.Comment", post=post, author=user, text="Спасибо")
+
+    assert set(changelist(admin_client, "comment", "moder").result_list) == {
+        by_text, by_author
+    }
+    assert list(
+        changelist(admin_client, "comment", "разбор").result_list
+    ) == [by_text]
+
+
+def test_comment_admin_search_uses_indexes(mixer: Mixer, admin_client, user):
+    post = mixer.blend("blog.Post", author=user)
+    mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        changelist(admin_client, "comment", "текст")
+    plans = []
+    for sql, params in statements:
+        if "blog_comment_fts" not in sql:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plans.extend(row[-1] for row in cursor.fetchall())
+    assert plans
+    assert not [
+        step for step in plans
+        if step.startswith(("SCAN blog_comment ", "SCAN auth_user"))
+        or step in ("SCAN blog_comment",)
+    ], "\n".join(plans)
@@ -0,0 +1,115 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.bulk import bulk_update_posts, chunked_ids, log_progress
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELIST = "/admin/blog/{}/"
+
+
+def run_action(admin_client, model: str, action: str, objects, **extra):
+    return admin_client.post(CHANGELIST.format(model), {
+        "action": action,
+        "_selected_action": [obj.pk for obj in objects],
+        **extra,
+    })
+
+
+def test_chunked_ids_walks_by_pk(mixer: Mixer, user):
+    posts = mixer.cycle(7).blend("blog.Post", author=user)
+    chunks = list(chunked_ids(Post.objects.all(), chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert sum(chunks, []) == sorted(post.pk for post in posts)
+
+
+def test_bulk_update_reports_progress_and_skips_unchanged(
+        mixer: Mixer, user
+):
+    mixer.cycle(5).blend("blog.Post", author=user, is_published=True)
+    mixer.cycle(2).blend("blog.Post", author=user, is_published=False)
+    reports = []
+
+    updated = bulk_update_posts(
+        Post.objects.all(), {"is_published": False}, chunk_size=2,
+        progress=lambda done, total: reports.append((done, total)))
+
+    assert updated == 5
+    assert reports == [(2, 5), (4, 5), (5, 5)]
+    assert not Post.objects.filter(is_published=True).exists()
+
+
+def test_progress_is_logged_with_project_logging(
+        mixer: Mixer, user, caplog
+):
+    mixer.cycle(3).blend("blog.Post", author=user, is_published=True)
+    bulk_update_posts(
+        Post.objects.all(), {"is_published": False}, chunk_size=2,
+        progress=log_progress("Снятие с публикации"))
+    messages = [
+        record.getMessage() for record in caplog.records
+        if record.name == "blog.bulk"
+    ]
+    assert messages == [
+        "Снятие с публикации: 2 из 3", "Снятие с публикации: 3 из 3"
+    ], "Настройка LOGGING должна пропускать записи blog.bulk уровня INFO."
+
+
+def test_bulk_update_queries_depend_on_chunks_not_rows(mixer: Mixer, user):
+    mixer.cycle(3).blend("blog.Post", author=user, is_published=True)
+    with CaptureQueriesContext(connection) as small:
+        bulk_update_posts(Post.objects.all(), {"is_published": False})
+    mixer.cycle(30).blend("blog.Post", author=user, is_published=True)
+    with CaptureQueriesContext(connection) as large:
+        bulk_update_posts(Post.objects.all(), {"is_published": True})
+    assert len(small.captured_queries) == len(large.captured_queries), (
+        "Массовое действие не должно выполнять запросы для каждой строки."
+    )
+
+
+def test_unpublish_action_clears_cached_feed(
+        mixer: Mixer, client, admin_client, user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, is_published=True,
+        category=published_category, title=mixer.sequence("Спам {0}"))
+    assert "Спам 0" in client.get("/").content.decode()
+
+    response = run_action(admin_client, "post", "unpublish", posts)
+
+    assert response.status_code == 302
+    assert "Спам 0" not in client.get("/").content.decode(), (
+        "После массового снятия с публикации кеш ленты должен сброситься."
+    )
+
+
+def test_move_to_category_uses_intermediate_form(
+        mixer: Mixer, admin_client, user, published_category
+):
+    target = mixer.blend("blog.Category", is_published=True)
+    posts = mixer.cycle(4).blend("blog.Post", author=user,
+                                 category=published_category)
+
+    response = run_action(admin_client, "post", "move_to_category", posts)
+    assert response.status_code == 200
+    assert "form" in response.context
+
+    response = run_action(admin_client, "post", "move_to_category", posts,
+                          apply="1", category=target.pk)
+    assert response.status_code == 302
+    assert Post.objects.filter(category=target).count() == 4
+
+
+def test_comment_actions_recount_counters(mixer: Mixer, admin_client, user):
+    post = mixer.blend("blog.Post", author=user)
+    comments = mixer.cycle(4).blend("blog.Comment", post=post,
+                                    is_published=True)
+    run_action(admin_client, "comment", "unpublish", comments[:3])
+
+    post.refresh_from_db()
+    assert post.comment_count == 4
+    assert post.published_comment_count == 1
+    assert Comment.objects.filter(is_published=False).count() == 3
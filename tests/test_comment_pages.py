@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.constants import COMMENTS_PAGINATE_BY
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_post(mixer: Mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category,
+    )
+    mixer.cycle(COMMENTS_PAGINATE_BY * 2 + 5).blend(
+        "blog.Comment", post=post, text=mixer.sequence("Комментарий {0}.")
+    )
+    return post
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+def test_detail_shows_first_comment_page(user_client, commented_post):
+    response, _ = count_queries(user_client, f"/posts/{commented_post.id}/")
+    comments = response.context["comments"]
+    assert len(comments) == COMMENTS_PAGINATE_BY
+    content = response.content.decode()
+    assert f"/posts/{commented_post.id}/comments/?page=2" in content
+
+
+def test_detail_query_count_does_not_depend_on_comments(
+        mixer: Mixer, user_client, commented_post
+):
+    url = f"/posts/{commented_post.id}/"
+    _, before = count_queries(user_client, url)
+    mixer.cycle(COMMENTS_PAGINATE_BY * 3).blend(
+        "blog.Comment", post=commented_post
+    )
+    _, after = count_queries(user_client, url)
+    assert before == after
+
+
+def test_comment_fragment_returns_next_batch(client, commented_post):
+    url = f"/posts/{commented_post.id}/comments/"
+    shown = set()
+    for page in (1, 2, 3):
+        response = client.get(f"{url}?page={page}")
+        assert response.status_code == 200
+        assert "<html" not in response.content.decode()
+        shown |= {comment.pk for comment in response.context["comments"]}
+    assert len(shown) == commented_post.comments.count()
+
+
+def test_comment_fragment_respects_visibility(client, commented_post):
+    commented_post.is_published = False
+    commented_post.save()
+    response = client.get(f"/posts/{commented_post.id}/comments/")
+    assert response.status_code == 404
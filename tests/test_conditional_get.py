@@ -0,0 +1,153 @@
+import re
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from blog.jobs import enqueue_renditions
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def page_urls(user, category, post):
+    return (
+        "/",
+        f"/category/{category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post.id}/",
+    )
+
+
+def test_unchanged_pages_answer_304(
+        user_client, user, published_category, published_post
+):
+    for url in page_urls(user, published_category, published_post):
+        first = user_client.get(url)
+        assert first.status_code == 200
+        assert first.has_header("ETag") and first.has_header("Last-Modified")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = user_client.get(
+                url, HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        assert response.status_code == 304, (
+            f"Неизменившаяся страница `{url}` должна отдаваться с кодом 304."
+        )
+        post_selects = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith('SELECT "blog_post"."id"')
+        ]
+        assert not post_selects, (
+            "Ответ 304 не должен выполнять основной запрос страницы."
+        )
+
+        response = user_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        assert response.status_code == 304
+
+
+def test_changes_produce_new_validator(
+        mixer: Mixer, user_client, user, published_category, published_post
+):
+    urls = page_urls(user, published_category, published_post)
+    etags = {url: user_client.get(url)["ETag"] for url in urls}
+
+    mixer.blend("blog.Comment", post=published_post)
+
+    for url in urls:
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == 200, (
+            f"После нового комментария страница `{url}` должна обновиться."
+        )
+
+
+def test_validator_depends_on_user(
+        user_client, another_user_client, published_post
+):
+    url = f"/posts/{published_post.id}/"
+    etag = user_client.get(url)["ETag"]
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_cached_anonymous_page_answers_304_without_queries(
+        client, published_post
+):
+    first = client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 304
+    assert not any('"blog_' in q["sql"] for q in ctx.captured_queries)
+
+
+def test_list_validator_does_not_aggregate_posts(
+        user_client, user, published_category, published_post
+):
+    for url in page_urls(user, published_category, published_post)[:3]:
+        etag = user_client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        aggregates = [
+            q["sql"] for q in ctx.captured_queries
+            if re.search(r"\b(COUNT|SUM|MAX)\(", q["sql"])
+        ]
+        assert not aggregates, (
+            f"Валидатор страницы `{url}` не должен агрегировать все посты:"
+            f" {aggregates}"
+        )
+
+
+def test_deferred_post_publication_produces_new_validator(
+        mixer: Mixer, user_client, published_category, published_post
+):
+    deferred = mixer.blend(
+        "blog.Post", is_published=True, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    etag = user_client.get("/")["ETag"]
+    # Время публикации наступило: в базу при этом никто не пишет.
+    Post.objects.filter(pk=deferred.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1))
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Отложенный пост, время публикации которого наступило, должен"
+        " обновлять валидатор ленты."
+    )
+
+
+def test_renditions_change_post_validator(
+        settings, tmp_path, mixer: Mixer, user_client, user,
+        published_category
+):
+    settings.MEDIA_ROOT = tmp_path
+    buffer = BytesIO()
+    Image.new("RGB", (1000, 500)).save(buffer, "JPEG")
+    name = default_storage.save(
+        "post_images/photo.jpg", ContentFile(buffer.getvalue()))
+    post = mixer.blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category, image=name,
+    )
+    url = f"/posts/{post.id}/"
+    enqueue_renditions(post)
+    etag = user_client.get(url)["ETag"]
+
+    call_command("image_worker", once=True, workers=1, stdout=StringIO())
+
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Когда готовы копии изображения, страница поста должна получить"
+        " новый ETag, иначе читатели останутся с оригиналом."
+    )
+    assert ".webp 640w" in response.content.decode()
@@ -19,7 +19,10 @@ from conftest import (
     _testget_context_item_by_key,
 )
 
-pytestmark = [pytest.mark.django_db]
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("query_budgets"),
+]
 
 
 class ContentTester(ABC):
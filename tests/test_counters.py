@@ -0,0 +1,74 @@
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def counters(post: Post):
+    post.refresh_from_db()
+    return post.comment_count, post.published_comment_count
+
+
+def test_counters_follow_comment_changes(mixer: Mixer, published_category):
+    post = mixer.blend("blog.Post", category=published_category)
+    another_post = mixer.blend("blog.Post", category=published_category)
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post, is_published=True
+    )
+    assert counters(post) == (3, 3)
+
+    comment = Comment.objects.get(pk=comments[0].pk)
+    comment.is_published = False
+    comment.save()
+    assert counters(post) == (3, 2)
+
+    comment.post = another_post
+    comment.save()
+    assert counters(post) == (2, 2)
+    assert counters(another_post) == (1, 0)
+
+    comments[1].delete()
+    assert counters(post) == (1, 1)
+
+    Comment.objects.filter(post=another_post).delete()
+    assert counters(another_post) == (0, 0)
+
+
+def test_reconcile_counters_fixes_drift(mixer: Mixer, published_category):
+    posts = mixer.cycle(5).blend("blog.Post", category=published_category)
+    for post in posts:
+        mixer.cycle(2).blend("blog.Comment", post=post, is_published=True)
+    Post.objects.filter(pk=posts[0].pk).update(comment_count=100)
+    Post.objects.filter(pk=posts[-1].pk).update(published_comment_count=0)
+
+    call_command("reconcile_counters", chunk_size=2)
+
+    assert all(counters(post) == (2, 2) for post in posts)
+
+
+def test_delete_with_drifted_counter_does_not_fail(
+    mixer: Mixer, published_category
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    comment = mixer.blend("blog.Comment", post=post, is_published=True)
+    Post.objects.filter(pk=post.pk).update(
+        comment_count=0, published_comment_count=0
+    )
+    comment.delete()
+    assert counters(post) == (0, 0)
+
+
+@pytest.mark.parametrize("n_comments", (5, 50))
+def test_post_delete_cost_does_not_depend_on_comments(
+    n_comments, mixer: Mixer, published_category,
+    django_assert_max_num_queries
+):
+    post = mixer.blend("blog.Post", category=published_category)
+    mixer.cycle(n_comments).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=0)
+    with django_assert_max_num_queries(10):
+        Post.objects.get(pk=post.pk).delete()
+    assert not Comment.objects.exists()
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog import views
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category):
+    # Несколько постов с одинаковой датой проверяют разрешение ничьих по id.
+    now = timezone.now()
+    dates = (now - timedelta(hours=i // 3) for i in range(N_PER_PAGE * 3))
+    return mixer.cycle(N_PER_PAGE * 3).blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category, pub_date=dates,
+    )
+
+
+def walk(client, url, first_query, cursor_key, direction):
+    seen = []
+    query = first_query
+    while True:
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url + query)
+        assert response.status_code == 200
+        assert not any(
+            "COUNT(*)" in q["sql"] for q in ctx.captured_queries
+        ), "Курсорная пагинация не должна выполнять COUNT(*)."
+        page = response.context["page_obj"]
+        assert page.is_cursor
+        seen.extend(page.object_list)
+        has_more = getattr(page, f"has_{direction}")()
+        if not has_more:
+            return page, seen
+        query = f"?{cursor_key}={getattr(page, f'{direction}_cursor')}"
+
+
+def test_cursor_pages_cover_feed_in_order(client, feed_posts):
+    page, seen = walk(client, "/", "?after=", "after", "next")
+    expected = sorted(
+        feed_posts, key=lambda post: (post.pub_date, post.pk), reverse=True
+    )
+    assert [post.pk for post in seen] == [post.pk for post in expected]
+
+    last_page_first_post = page.object_list[0]
+    _, back = walk(
+        client, "/", f"?before={page.previous_cursor}", "before", "previous"
+    )
+    assert last_page_first_post not in back
+    assert len(back) == len(expected) - len(page.object_list)
+
+
+def test_deep_numbered_page_switches_to_cursor(
+        user_client, feed_posts, monkeypatch
+):
+    response = user_client.get("/?page=2")
+    assert response.context["page_obj"].next_cursor is None
+
+    monkeypatch.setattr(views, "CURSOR_PAGINATION_DEPTH", 2)
+    response = user_client.get("/?page=2")
+    page = response.context["page_obj"]
+    assert page.next_cursor
+    assert f"?after={page.next_cursor}" in response.content.decode()
+
+
+def test_broken_cursor_returns_404(client, feed_posts):
+    assert client.get("/?after=not-a-cursor").status_code == 404
@@ -0,0 +1,77 @@
+from importlib import import_module
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{i}" for i in range(100))
+
+
+def test_excerpt_is_computed_on_save(mixer: Mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", text=LONG_TEXT, category=published_category
+    )
+    assert post.excerpt == " ".join(LONG_TEXT.split()[:10]) + " …"
+
+    post.text = "Короткий текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Короткий текст"
+
+
+def test_feed_does_not_load_post_text(
+        mixer: Mixer, user_client, user, published_category
+):
+    mixer.cycle(3).blend(
+        "blog.Post", is_published=True, author=user, text=LONG_TEXT,
+        category=published_category,
+    )
+    for url in ("/", f"/category/{published_category.slug}/",
+                f"/profile/{user.username}/"):
+        with CaptureQueriesContext(connection) as ctx:
+            content = user_client.get(url).content.decode()
+        assert "слово9 …" in content
+        assert "слово50" not in content
+        assert not any(
+            '"blog_post"."text"' in query["sql"]
+            for query in ctx.captured_queries
+        ), f"Страница `{url}` не должна загружать полный текст постов."
+
+
+def test_backfill_excerpts(mixer: Mixer, published_category):
+    posts = mixer.cycle(5).blend(
+        "blog.Post", text=LONG_TEXT, category=published_category
+    )
+    Post.objects.update(excerpt="")
+
+    call_command("backfill_excerpts", chunk_size=2)
+
+    assert set(
+        Post.objects.filter(pk__in=[post.pk for post in posts])
+        .values_list("excerpt", flat=True)
+    ) == {posts[0].excerpt}
+
+
+def test_migration_fills_empty_excerpts(mixer: Mixer, published_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", text=LONG_TEXT, category=published_category
+    )
+    Post.objects.update(excerpt="")
+    migration = import_module("blog.migrations.0014_post_excerpt_backfill")
+
+    # На SQLite schema_editor нельзя открыть внутри транзакции теста;
+    # RunPython берёт у него только соединение.
+    migration.fill_excerpts(apps, SimpleNamespace(connection=connection))
+
+    assert set(
+        Post.objects.filter(pk__in=[post.pk for post in posts])
+        .values_list("excerpt", flat=True)
+    ) == {posts[0].excerpt}
@@ -0,0 +1,274 @@
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from blog.constants import IMAGE_JOB_MAX_ATTEMPTS
+from blog.management.commands import image_worker
+from blog.images import generate_renditions, rendition_files
+from blog.jobs import enqueue_renditions
+from blog.models import ImageJob, Post, PostFile
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_image(size=(1000, 500), image_format="JPEG") -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(73, 109, 137)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def test_renditions_are_stored_next_to_original():
+    name = default_storage.save("post_images/photo.jpg",
+                                ContentFile(make_image()))
+
+    renditions = generate_renditions(name)
+
+    assert renditions["source"] == name
+    card = renditions["card"]
+    assert (card["width"], card["height"]) == (400, 200)
+    assert [width for _, width in card["webp"]] == [400, 800]
+    for files, extension in ((card["webp"], ".webp"),
+                             (card["fallback"], ".jpg"),
+                             (renditions["detail"]["webp"], ".webp")):
+        for rendition_name, width in files:
+            with default_storage.open(rendition_name) as file:
+                content = file.read()
+            assert rendition_name == (
+                "post_images/" + hashlib.sha256(content).hexdigest()
+                + extension
+            ), (
+                "Копия должна храниться рядом с оригиналом под именем"
+                " из SHA-256 своего содержимого."
+            )
+            assert Image.open(BytesIO(content)).width == width
+
+    assert generate_renditions(name) == renditions, (
+        "Повторная генерация должна давать те же файлы, а не копии."
+    )
+
+
+def test_small_image_is_not_upscaled():
+    name = default_storage.save("post_images/small.png",
+                                ContentFile(make_image((100, 80), "PNG")))
+
+    renditions = generate_renditions(name)
+
+    for rendition in ("card", "detail"):
+        assert renditions[rendition]["width"] == 100
+        assert [width for _, width in renditions[rendition]["webp"]] == [100]
+
+
+def test_created_post_renders_srcset(user_client, user, published_category):
+    response = user_client.post("/posts/create/", {
+        "title": "С картинкой",
+        "text": "Текст",
+        "pub_date": timezone.localtime().strftime("%Y-%m-%dT%H:%M"),
+        "category": published_category.pk,
+        "is_published": True,
+        "image": SimpleUploadedFile(
+            "photo.jpg", make_image(), content_type="image/jpeg"),
+    })
+    assert response.status_code == 302
+    post = Post.objects.get(title="С картинкой")
+    assert not post.image_renditions, (
+        "Копии изображения должны создаваться обработчиком очереди,"
+        " а не в запросе сохранения поста."
+    )
+    assert f'src="{post.image.url}"' in user_client.get("/").content.decode()
+
+    call_command("image_worker", once=True, workers=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.image_renditions["source"] == post.image.name
+    content = user_client.get("/").content.decode()
+    assert ".webp 400w" in content, (
+        "Карточка поста должна ссылаться на уменьшенные копии через srcset."
+    )
+    assert 'width="400" height="200"' in content
+    content = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert ".webp 640w" in content
+
+
+def test_post_without_renditions_shows_original(
+        user_client, post_with_published_location
+):
+    content = user_client.get("/").content.decode()
+    assert f'src="{post_with_published_location.image.url}"' in content
+
+
+def test_generate_renditions_command(
+        mixer: Mixer, user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        image=mixer.sequence(
+            lambda i: default_storage.save(
+                f"post_images/backfill{i}.jpg", ContentFile(make_image()))
+        ),
+    )
+
+    updated = {post.pk: post.updated_at for post in posts}
+    call_command("generate_renditions", workers=2, chunk_size=2)
+
+    for post in posts:
+        post.refresh_from_db()
+        assert post.image_renditions["source"] == post.image.name
+        assert post.updated_at > updated[post.pk], (
+            "Команда должна обновлять updated_at: по нему строится ETag"
+            " страницы поста."
+        )
+        assert default_storage.exists(
+            post.image_renditions["card"]["webp"][0][0])
+
+
+def file_names(post) -> set:
+    return set(PostFile.objects.filter(post=post).values_list(
+        "name", flat=True))
+
+
+def test_post_files_follow_image_and_renditions(
+        mixer: Mixer, user, published_category
+):
+    first = default_storage.save("post_images/first.jpg",
+                                 ContentFile(make_image()))
+    post = mixer.blend("blog.Post", author=user,
+                       category=published_category, image=first)
+    assert file_names(post) == {first}
+
+    enqueue_renditions(post)
+    call_command("image_worker", once=True, workers=1, stdout=StringIO())
+    post.refresh_from_db()
+    renditions = set(rendition_files(post.image_renditions))
+    assert renditions
+    assert file_names(post) == {first} | renditions, (
+        "Копии изображения должны записываться в PostFile, чтобы"
+        " serve_media находила их владельца по индексу."
+    )
+
+    second = default_storage.save(
+        "post_images/second.jpg", ContentFile(make_image((600, 300))))
+    post.image = second
+    post.image_renditions = {}
+    post.save()
+    assert file_names(post) == {second}
+
+    Post.objects.filter(pk=post.pk).update(image_renditions={})
+    call_command("generate_renditions", workers=1)
+    post.refresh_from_db()
+    assert file_names(post) == (
+        {second} | set(rendition_files(post.image_renditions)))
+
+
+def test_broken_image_job_fails_after_retries(
+        mixer: Mixer, user, published_category
+):
+    name = default_storage.save("post_images/broken.jpg",
+                                ContentFile(b"not an image"))
+    post = mixer.blend("blog.Post", author=user,
+                       category=published_category, image=name)
+    enqueue_renditions(post)
+
+    for _ in range(IMAGE_JOB_MAX_ATTEMPTS):
+        call_command("image_worker", once=True, workers=1,
+                     stdout=StringIO(), stderr=StringIO())
+
+    job = ImageJob.objects.get(post=post)
+    assert job.status == ImageJob.FAILED
+    assert job.attempts == IMAGE_JOB_MAX_ATTEMPTS
+    assert job.error
+
+
+def test_replaced_image_ignores_stale_job(
+        mixer: Mixer, user, published_category
+):
+    first = default_storage.save("post_images/first.jpg",
+                                 ContentFile(make_image()))
+    post = mixer.blend("blog.Post", author=user,
+                       category=published_category, image=first)
+    enqueue_renditions(post)
+    job = ImageJob.objects.get()
+    # Изображение заменено, пока задание ждало в очереди.
+    Post.objects.filter(pk=post.pk).update(image="post_images/second.jpg")
+
+    call_command("image_worker", once=True, workers=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    job.refresh_from_db()
+    assert job.status == ImageJob.DONE
+    assert job.duration is not None
+    assert not post.image_renditions
+
+
+def test_worker_status_reports_queue_depth(
+        mixer: Mixer, user, published_category
+):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category,
+        image="post_images/queued.jpg",
+    )
+    for post in posts:
+        enqueue_renditions(post)
+    out = StringIO()
+
+    call_command("image_worker", status=True, stdout=out)
+
+    assert "В очереди: 2" in out.getvalue()
+
+
+def test_worker_closes_connections_before_each_submit(
+        monkeypatch, mixer: Mixer, user, published_category
+):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        image=mixer.sequence(
+            lambda i: default_storage.save(
+                f"post_images/queued{i}.jpg", ContentFile(make_image()))
+        ),
+    )
+    for post in Post.objects.all():
+        enqueue_renditions(post)
+    events = []
+    monkeypatch.setattr(
+        image_worker, "close_connections_before_fork",
+        lambda: events.append("close"))
+    submit = ProcessPoolExecutor.submit
+
+    def record_submit(self, *args, **kwargs):
+        events.append("submit")
+        return submit(self, *args, **kwargs)
+
+    monkeypatch.setattr(ProcessPoolExecutor, "submit", record_submit)
+
+    def record_query(execute, *args):
+        events.append("query")
+        return execute(*args)
+
+    with connection.execute_wrapper(record_query):
+        call_command(
+            "image_worker", once=True, workers=1, stdout=StringIO())
+
+    assert events.count("submit") == 3
+    for index, event in enumerate(events):
+        if event == "submit":
+            last_close = max(
+                i for i, e in enumerate(events[:index]) if e == "close")
+            assert "query" not in events[last_close:index], (
+                "Между закрытием соединений и отправкой задачи в пул"
+                " процессов база не должна открываться снова."
+            )
@@ -0,0 +1,139 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from mixer.backend.django import Mixer
+
+CONTENT = bytes(range(256)) * 4
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_name(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return default_storage.save("post_images/file.jpg", ContentFile(CONTENT))
+
+
+@pytest.fixture
+def media_file(mixer: Mixer, media_name, published_category):
+    mixer.blend(
+        "blog.Post", image=media_name, is_published=True,
+        category=published_category,
+    )
+    return f"/media/{media_name}"
+
+
+def read(response) -> bytes:
+    return b"".join(response.streaming_content)
+
+
+def test_file_is_served_with_cache_headers(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert read(response) == CONTENT
+    assert response["Content-Type"] == "image/jpeg"
+    assert response["Accept-Ranges"] == "bytes"
+    assert "max-age=31536000" in response["Cache-Control"]
+
+    response = client.get(
+        media_file, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304, (
+        "Повторный запрос с ETag должен получать ответ 304."
+    )
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=1000-", (1000, 1023)),
+        ("bytes=-24", (1000, 1023)),
+        ("bytes=10-5000", (10, 1023)),
+    ],
+)
+def test_range_requests(client, media_file, header, expected):
+    start, end = expected
+    response = client.get(media_file, HTTP_RANGE=header)
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes {start}-{end}/1024"
+    assert response["Content-Length"] == str(end - start + 1)
+    assert read(response) == CONTENT[start:end + 1]
+
+
+def test_unsatisfiable_range(client, media_file):
+    response = client.get(media_file, HTTP_RANGE="bytes=5000-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+
+
+def test_stale_if_range_returns_whole_file(client, media_file):
+    response = client.get(
+        media_file, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+    assert response.status_code == 200
+    assert read(response) == CONTENT
+
+
+def test_path_outside_media_root_is_not_served(client, media_file):
+    assert client.get("/media/..%2F..%2Fsettings.py").status_code == 404
+    assert client.get("/media/post_images/missing.jpg").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "mode, header",
+    [("x-accel", "X-Accel-Redirect"), ("x-sendfile", "X-Sendfile")],
+)
+def test_proxy_modes_delegate_file_to_web_server(
+        client, settings, media_file, mode, header
+):
+    settings.MEDIA_SERVE_MODE = mode
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert not response.content
+    name = media_file[len("/media/"):]
+    assert response[header].endswith(name)
+
+
+def test_rendition_of_public_post_is_served(
+        client, mixer: Mixer, media_name, published_category
+):
+    mixer.blend(
+        "blog.Post", image="post_images/original.jpg", is_published=True,
+        category=published_category,
+        image_renditions={"card": {
+            "width": 10, "height": 10,
+            "webp": [[media_name, 10]], "fallback": [[media_name, 10]],
+        }},
+    )
+    response = client.get(f"/media/{media_name}")
+    assert response.status_code == 200
+    assert response["Cache-Control"].startswith("public")
+
+
+def test_file_without_post_is_not_served(client, media_name):
+    assert client.get(f"/media/{media_name}").status_code == 404, (
+        "Файл, не принадлежащий ни одному посту, не должен отдаваться."
+    )
+
+
+@pytest.mark.parametrize("mode", ["django", "x-accel", "x-sendfile"])
+def test_unpublished_post_file_is_private(
+        client, user_client, another_user_client, admin_client, settings,
+        mixer: Mixer, user, media_name, published_category, mode
+):
+    settings.MEDIA_SERVE_MODE = mode
+    mixer.blend(
+        "blog.Post", image=media_name, is_published=False, author=user,
+        category=published_category,
+    )
+    url = f"/media/{media_name}"
+    assert client.get(url).status_code == 404
+    assert another_user_client.get(url).status_code == 404, (
+        "Изображение черновика не должно быть доступно другим"
+        " пользователям."
+    )
+    for own_client in (user_client, admin_client):
+        response = own_client.get(url)
+        assert response.status_code == 200
+        assert response["Cache-Control"].startswith("private"), (
+            "Файл черновика не должен кешироваться в общих кешах."
+        )
@@ -0,0 +1,160 @@
+import json
+import os
+import re
+
+import pytest
+
+from blogicum import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+SAMPLE_RE = re.compile(r"^(\w+)(\{[^}]*\})? (\S+)$")
+
+
+@pytest.fixture(autouse=True)
+def registry(settings, tmp_path, monkeypatch):
+    settings.METRICS_DIR = str(tmp_path)
+    fresh = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+def scrape(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE_RE.match(line).groups()
+        samples[name + (labels or "")] = float(value)
+    return samples
+
+
+def test_requests_labelled_by_view_name(client, published_post):
+    client.get("/")
+    client.get("/")
+    client.get(f"/posts/{published_post.id}/")
+    client.get("/no-such-page/")
+
+    samples = scrape(client)
+    assert samples[
+        'blogicum_http_requests_total'
+        '{method="GET",status="200",view="blog:index"}'
+    ] == 2
+    assert samples[
+        'blogicum_http_requests_total'
+        '{method="GET",status="200",view="blog:post_detail"}'
+    ] == 1
+    assert samples[
+        'blogicum_http_requests_total'
+        '{method="GET",status="404",view="unmatched"}'
+    ] == 1, "Запросы без маршрута должны попадать в один ряд unmatched."
+
+    index = 'view="blog:index"'
+    assert samples[
+        'blogicum_http_request_duration_seconds_count{' + index + '}'
+    ] == 2
+    assert samples[
+        'blogicum_http_request_duration_seconds_bucket{'
+        + index + ',le="+Inf"}'
+    ] == 2
+    assert samples[
+        'blogicum_http_response_size_bytes_sum{' + index + '}'
+    ] > 0
+    assert samples[
+        'blogicum_db_queries_per_request_sum{'
+        'view="blog:post_detail"}'
+    ] > 0, "Гистограмма SQL-запросов должна учитывать запросы к базе."
+
+
+def test_histogram_buckets_are_cumulative(client):
+    for value in (0.001, 0.2, 30):
+        metrics.registry.observe(
+            "blogicum_http_request_duration_seconds", {"view": "x"}, value
+        )
+    samples = scrape(client)
+    bucket = 'blogicum_http_request_duration_seconds_bucket{view="x",le="%s"}'
+    assert samples[bucket % "0.005"] == 1
+    assert samples[bucket % "0.25"] == 2
+    assert samples[bucket % "10.0"] == 2
+    assert samples[bucket % "+Inf"] == 3
+
+
+def test_scrape_merges_other_processes(client, tmp_path):
+    metrics.registry.inc(
+        "blogicum_http_requests_total",
+        {"view": "blog:index", "method": "GET", "status": "200"},
+    )
+    (tmp_path / "999999.json").write_text(json.dumps({
+        "counters": [[
+            "blogicum_http_requests_total",
+            {"view": "blog:index", "method": "GET", "status": "200"},
+            4,
+        ]],
+        "histograms": [],
+    }))
+    samples = scrape(client)
+    assert samples[
+        'blogicum_http_requests_total'
+        '{method="GET",status="200",view="blog:index"}'
+    ] == 5, "Метрики всех процессов должны складываться при чтении."
+
+
+def test_dead_process_files_are_archived(client, tmp_path):
+    dead_pid = 2 ** 22 + 1  # больше любого pid_max в Linux
+    labels = {"view": "blog:index", "method": "GET", "status": "200"}
+    for number in range(2):
+        (tmp_path / f"{dead_pid}-{number}.json").write_text(json.dumps({
+            "counters": [["blogicum_http_requests_total", labels, 3]],
+            "histograms": [],
+        }))
+    key = (
+        'blogicum_http_requests_total'
+        '{method="GET",status="200",view="blog:index"}'
+    )
+    assert scrape(client)[key] == 6
+    files = {path.name for path in tmp_path.glob("*.json")}
+    assert files == {"archive.json", metrics.registry.filename}
+    assert scrape(client)[key] == 6, (
+        "Итоги завершившихся процессов должны сохраняться в archive.json"
+        " и учитываться ровно один раз."
+    )
+
+
+def test_process_file_is_unique_per_start(tmp_path):
+    first, second = metrics.Registry(), metrics.Registry()
+    first.flush(force=True)
+    second.flush(force=True)
+    assert first.filename != second.filename, (
+        "Новый процесс с тем же pid не должен затирать файл прежнего."
+    )
+    assert len(list(tmp_path.glob(f"{os.getpid()}-*.json"))) == 2
+
+
+def test_metrics_hidden_from_other_hosts(client):
+    response = client.get("/metrics", REMOTE_ADDR="203.0.113.5")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "header", ["HTTP_X_FORWARDED_FOR", "HTTP_X_REAL_IP", "HTTP_FORWARDED"]
+)
+def test_metrics_hidden_from_proxied_requests(client, header):
+    # За обратным прокси внешний запрос приходит с 127.0.0.1.
+    response = client.get("/metrics", **{header: "203.0.113.5"})
+    assert response.status_code == 404, (
+        "Запрос, пришедший через прокси, не должен получать /metrics."
+    )
+
+
+def test_metrics_token_required_when_configured(settings, client):
+    settings.METRICS_TOKEN = "secret"
+    assert client.get("/metrics").status_code == 404
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer wrong"
+    ).status_code == 404
+    assert client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer secret"
+    ).status_code == 200
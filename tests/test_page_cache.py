@@ -0,0 +1,167 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+from mixer.backend.django import Mixer
+
+from blog.cache import get_render_stats, get_stats
+from blogicum import settings as project_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_twice(client, url):
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get(url)
+    return first, second, ctx.captured_queries
+
+
+def test_anonymous_pages_are_served_from_cache(
+        client, user, published_category, published_post
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{published_post.id}/",
+    )
+    for url in urls:
+        first, second, queries = get_twice(client, url)
+        assert first["X-Page-Cache"] == "MISS"
+        assert second["X-Page-Cache"] == "HIT"
+        assert second.content == first.content
+        assert not any('"blog_' in q["sql"] for q in queries), (
+            f"Повторный запрос `{url}` должен обслуживаться из кеша."
+        )
+    assert get_stats(("page_hit", "page_miss")) == {
+        "page_hit": len(urls), "page_miss": len(urls)
+    }
+
+
+def test_authenticated_requests_bypass_cache(user_client, published_post):
+    first, second, _ = get_twice(user_client, "/")
+    assert "X-Page-Cache" not in second
+    assert second.context is not None
+
+
+def test_changes_invalidate_only_affected_pages(
+        mixer: Mixer, client, user, published_category, another_category,
+        published_post
+):
+    other_post = mixer.blend(
+        "blog.Post", is_published=True, category=another_category
+    )
+    detail_url = f"/posts/{published_post.id}/"
+    other_detail_url = f"/posts/{other_post.id}/"
+    other_category_url = f"/category/{another_category.slug}/"
+    for url in ("/", detail_url, other_detail_url, other_category_url):
+        client.get(url)
+
+    mixer.blend("blog.Comment", post=published_post, text="Новый комментарий")
+
+    assert client.get(detail_url)["X-Page-Cache"] == "MISS"
+    assert client.get("/")["X-Page-Cache"] == "MISS"
+    assert client.get(other_detail_url)["X-Page-Cache"] == "HIT"
+    assert client.get(other_category_url)["X-Page-Cache"] == "HIT"
+
+    published_post.is_published = False
+    published_post.save()
+    assert client.get(detail_url).status_code == 404
+    assert client.get(other_detail_url)["X-Page-Cache"] == "HIT"
+
+
+def test_page_cache_stats_command(client, published_post, capsys):
+    client.get("/")
+    client.get("/")
+    call_command("page_cache_stats")
+    output = capsys.readouterr().out
+    assert "Попаданий: 1" in output
+    assert "Промахов: 1" in output
+
+
+def test_default_cache_is_shared_between_processes(
+        client, published_post, tmp_path
+):
+    # Настройки проекта, а не заменённый в conftest кеш тестов.
+    shared = {
+        "default": {
+            **project_settings.CACHES["default"], "LOCATION": str(tmp_path)
+        }
+    }
+    with override_settings(CACHES=shared):
+        client.get("/")
+        client.get("/")
+    manage = Path(settings.BASE_DIR) / "manage.py"
+    env = {
+        key: value for key, value in os.environ.items()
+        if key != "CACHE_BACKEND"
+    }
+    env["CACHE_LOCATION"] = str(tmp_path)
+    output = subprocess.run(
+        [sys.executable, str(manage), "page_cache_stats"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert "Попаданий: 1" in output and "Промахов: 1" in output, (
+        "Статистика кеша страниц должна быть видна из другого процесса."
+    )
+
+
+def test_post_cards_are_cached_per_post(
+        mixer: Mixer, user_client, user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category,
+    )
+    user_client.get("/")
+    posts[0].title = "Обновлённый заголовок"
+    posts[0].save()
+    mixer.blend("blog.Comment", post=posts[1])
+
+    content = user_client.get("/").content.decode()
+    assert "Обновлённый заголовок" in content
+    assert "Комментарии (1)" in content
+
+    render = get_render_stats("post_card")
+    assert render["count"] == 2 * len(posts)
+
+
+def test_unchanged_cards_are_not_rerendered(
+        mixer: Mixer, user_client, user, published_category
+):
+    mixer.cycle(3).blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category,
+    )
+    user_client.get("/")
+    response = user_client.get("/")
+    rendered = [
+        template.name for template in response.templates
+        if template.name == "includes/post_card_body.html"
+    ]
+    assert not rendered, (
+        "Неизменённые карточки постов должны браться из кеша фрагментов."
+    )
+
+
+@pytest.mark.parametrize("backend", sorted(project_settings.CACHE_BACKENDS))
+def test_cache_backend_options_are_installed(backend, tmp_path):
+    # Бэкенд memcached импортирует клиент при создании, но к серверу
+    # не подключается.
+    cache = import_string(project_settings.CACHE_BACKENDS[backend])(
+        str(tmp_path) if backend == "file" else "127.0.0.1:11211", {}
+    )
+    assert isinstance(cache, BaseCache), (
+        f"CACHE_BACKEND={backend} должен работать с пакетами из"
+        " requirements.txt."
+    )
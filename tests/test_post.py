@@ -31,6 +31,8 @@ from form.post.form_tester import PostFormTester
 from test_content import MainPostContentTester, main_content_tester
 from test_edit import _test_edit
 
+pytestmark = [pytest.mark.usefixtures("query_budgets")]
+
 
 @pytest.mark.parametrize(
     ("field", "type", "params", "field_error", "type_error",
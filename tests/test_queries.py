@@ -0,0 +1,100 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENTS_PER_POST = 3
+
+
+def blend_posts_with_comments(mixer: Mixer, n_posts: int, **post_kwargs):
+    posts = mixer.cycle(n_posts).blend(
+        "blog.Post", is_published=True, **post_kwargs
+    )
+    for post in posts:
+        mixer.cycle(COMMENTS_PER_POST).blend("blog.Comment", post=post)
+    return posts
+
+
+def capture_page_queries(client, url: str) -> list:
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f"Страница `{url}` должна загружаться без ошибок."
+    )
+    return [query["sql"] for query in ctx.captured_queries]
+
+
+def count_page_queries(client, url: str) -> int:
+    return len(capture_page_queries(client, url))
+
+
+def assert_queries_bounded_by_page(queries: list, url: str):
+    for sql in queries:
+        if re.match(r'SELECT .* FROM "blog_post"', sql) and (
+                "COUNT(" not in sql):
+            assert "LIMIT" in sql, (
+                f"На странице `{url}` посты должны выбираться из базы"
+                " постранично, а не целиком."
+            )
+        assert 'FROM "blog_comment"' not in sql, (
+            f"На странице `{url}` количество комментариев должно браться"
+            " из счётчика поста, а не подсчитываться по комментариям."
+        )
+
+
+def page_urls(user, category):
+    return (
+        "/",
+        f"/category/{category.slug}/",
+        f"/profile/{user.username}/",
+    )
+
+
+def test_post_lists_query_count_is_o_page(
+        mixer, user, user_client, published_category
+):
+    blend_posts_with_comments(
+        mixer, N_PER_PAGE, author=user, category=published_category
+    )
+    urls = page_urls(user, published_category)
+    small = [count_page_queries(user_client, url) for url in urls]
+
+    blend_posts_with_comments(
+        mixer, N_PER_PAGE * 3, author=user, category=published_category
+    )
+    large = []
+    for url in urls:
+        queries = capture_page_queries(user_client, url)
+        assert_queries_bounded_by_page(queries, url)
+        large.append(len(queries))
+
+    assert small == large, (
+        "Количество запросов на страницах со списком постов не должно"
+        " зависеть от общего числа постов и комментариев."
+    )
+
+
+def test_comment_count_is_read_from_post(
+        mixer, user, user_client, published_category
+):
+    posts = blend_posts_with_comments(
+        mixer, N_PER_PAGE * 2, author=user, category=published_category
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    assert not any(
+        'FROM "blog_comment"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Количество комментариев должно читаться из счётчика поста."
+    page_posts = response.context["page_obj"].object_list
+    assert len(page_posts) == N_PER_PAGE
+    assert all(
+        post.comment_count == COMMENTS_PER_POST for post in page_posts
+    )
+    assert {post.id for post in page_posts} <= {post.id for post in posts}
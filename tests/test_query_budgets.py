@@ -0,0 +1,112 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import get_resolver
+from mixer.backend.django import Mixer
+
+from blog import views
+from blog.constants import ADMIN_INLINE_COMMENTS
+from blog.urls import QUERY_BUDGETS, app_name, urlpatterns
+from blogicum.slow_queries import normalize_sql
+from conftest import N_PER_PAGE
+from fixtures.queries import check_queries
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+
+def test_every_blog_route_has_budget():
+    missing = [
+        pattern.name for pattern in urlpatterns
+        if pattern.name not in QUERY_BUDGETS
+    ]
+    assert not missing, (
+        f"Для маршрутов {missing} в blog/urls.py не задан бюджет запросов."
+    )
+    assert app_name in get_resolver().namespace_dict
+
+
+def test_normalize_sql_ignores_parameters():
+    first = normalize_sql(
+        'SELECT * FROM "blog_post" WHERE "id" IN (1, 2, 3)'
+        " AND \"title\" = 'O''Brien'"
+    )
+    second = normalize_sql(
+        'SELECT *  FROM "blog_post" WHERE "id" IN (7) AND "title" = \'x\''
+    )
+    assert first == second == (
+        'SELECT * FROM "blog_post" WHERE "id" IN (...) AND "title" = ?'
+    )
+
+
+def test_repeated_queries_are_reported_as_n_plus_one():
+    queries = [
+        f'SELECT * FROM "auth_user" WHERE "id" = {pk}' for pk in range(5)
+    ]
+    with pytest.raises(AssertionError, match="N\\+1"):
+        check_queries("GET", "/", "blog:index", queries)
+
+
+def test_budget_overrun_is_reported():
+    queries = [
+        f'SELECT * FROM "table_{number}"'
+        for number in range(QUERY_BUDGETS["index"] + 1)
+    ]
+    with pytest.raises(AssertionError, match="бюджете"):
+        check_queries("GET", "/", "blog:index", queries)
+
+
+def test_fixture_catches_n_plus_one_in_view(
+    monkeypatch, mixer: Mixer, user_client, published_category,
+    query_budgets
+):
+    mixer.cycle(N_PER_PAGE).blend(
+        "blog.Post", is_published=True, category=published_category
+    )
+    # Регрессия: лента без select_related запрашивает автора и категорию
+    # каждой карточки отдельно.
+    monkeypatch.setattr(
+        views.PostListView, "get_queryset",
+        lambda self: views.get_post_queryset().defer("text"),
+    )
+    with pytest.raises(AssertionError, match="N\\+1"):
+        user_client.get("/")
+    assert query_budgets == [], (
+        "Запрос с N+1 не должен попадать в журнал успешных проверок."
+    )
+
+
+@pytest.mark.parametrize("comments", [1, ADMIN_INLINE_COMMENTS])
+def test_admin_post_change_has_no_n_plus_one(
+    mixer: Mixer, admin_client, query_budgets, comments
+):
+    post = mixer.blend("blog.Post")
+    authors = mixer.cycle(comments).blend(User)
+    mixer.cycle(comments).blend(
+        "blog.Comment", post=post, author=(author for author in authors),
+    )
+    response = admin_client.get(f"/admin/blog/post/{post.pk}/change/")
+    assert response.status_code == 200
+    for author in authors:
+        assert (
+            f'<option value="{author.pk}" selected>{author.username}</option>'
+        ) in response.content.decode()
+    assert query_budgets[-1][0] == "admin:blog_post_change"
+
+
+def test_admin_post_change_query_count_does_not_depend_on_comments(
+    mixer: Mixer, admin_client, query_budgets
+):
+    counts = []
+    for comments in (1, ADMIN_INLINE_COMMENTS):
+        post = mixer.blend("blog.Post")
+        mixer.cycle(comments).blend(
+            "blog.Comment", post=post,
+            author=(author for author in mixer.cycle(comments).blend(User)),
+        )
+        admin_client.get(f"/admin/blog/post/{post.pk}/change/")
+        counts.append(query_budgets[-1][1])
+    assert counts[0] == counts[1], (
+        "Число запросов страницы поста в админке не должно зависеть от"
+        " числа комментариев в инлайне: авторов загружает select_related."
+    )
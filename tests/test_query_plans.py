@@ -0,0 +1,105 @@
+import re
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="EXPLAIN QUERY PLAN проверяется только для SQLite.",
+    ),
+]
+
+FULL_SCAN = re.compile(r"\bSCAN (?:TABLE )?(blog_\w+)\b(?! USING)")
+FULL_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def explain(sql: str, params) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(client, url: str) -> list:
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f"Страница `{url}` должна загружаться без ошибок."
+    )
+    scans = []
+    for sql, params in statements:
+        if not sql.startswith("SELECT") or '"blog_' not in sql:
+            continue
+        for step in explain(sql, params):
+            if FULL_SCAN.search(step) or FULL_SORT in step:
+                scans.append(f"{step}: {sql}")
+    return scans
+
+
+@pytest.fixture
+def populated_blog(mixer: Mixer, user, published_category,
+                   published_location):
+    posts = mixer.cycle(N_PER_PAGE * 2).blend(
+        "blog.Post", is_published=True, author=user,
+        category=published_category, location=published_location,
+    )
+    for post in posts[:3]:
+        mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    return posts
+
+
+def view_urls(user, category, post):
+    return (
+        "/",
+        "/?page=2",
+        "/?after=",
+        f"/category/{category.slug}/",
+        f"/category/{category.slug}/?after=",
+        f"/profile/{user.username}/",
+        f"/profile/{user.username}/?after=",
+        f"/posts/{post.id}/",
+    )
+
+
+def test_views_do_not_scan_full_tables(
+        user_client, user, published_category, populated_blog
+):
+    post = populated_blog[0]
+    for url in view_urls(user, published_category, post):
+        scans = full_scans(user_client, url)
+        assert not scans, (
+            f"Запросы страницы `{url}` должны использовать индексы, а не"
+            " полный просмотр или сортировку таблицы:\n" + "\n".join(scans)
+        )
+
+
+@pytest.mark.parametrize("is_published", [True, False])
+def test_media_owner_lookup_uses_indexes(
+        settings, tmp_path, mixer: Mixer, user, user_client, admin_client,
+        published_category, populated_blog, is_published
+):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_SERVE_MODE = "x-accel"
+    name = default_storage.save("post_images/file.jpg", ContentFile(b"jpg"))
+    mixer.blend(
+        "blog.Post", image=name, is_published=is_published, author=user,
+        category=published_category,
+    )
+    for client in (user_client, admin_client):
+        scans = full_scans(client, f"/media/{name}")
+        assert not scans, (
+            "Владелец медиафайла должен находиться по индексу, а не"
+            " полным просмотром таблицы постов:\n" + "\n".join(scans)
+        )
@@ -0,0 +1,142 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blogicum.routers import ReplicaRouter, read_from_replica
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Репликация имитируется копированием файлов SQLite.",
+    ),
+]
+
+REPLICA = "replica1"
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    connections.databases[REPLICA] = {
+        **connections.databases["default"],
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+def replicate():
+    call_command("simulate_replication", once=True, stdout=StringIO())
+
+
+@pytest.fixture
+def blend_post(mixer: Mixer, user, published_category):
+    def blend(title):
+        return mixer.blend(
+            "blog.Post",
+            title=title,
+            author=user,
+            category=published_category,
+            is_published=True,
+            pub_date=timezone.now() - timedelta(days=1),
+        )
+    return blend
+
+
+def test_router_reads_replica_only_when_enabled(replica):
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == "default"
+    with read_from_replica():
+        assert router.db_for_read(Post) == replica
+    assert router.db_for_write(Post) == "default"
+
+
+def test_public_pages_read_lagging_replica(
+    replica, user_client, blend_post
+):
+    blend_post("Реплицированный пост")
+    replicate()
+    blend_post("Свежий пост")
+
+    content = user_client.get("/").content.decode()
+    assert "Реплицированный пост" in content
+    assert "Свежий пост" not in content, (
+        "Главная страница должна читать данные из реплики."
+    )
+
+    replicate()
+    content = user_client.get("/").content.decode()
+    assert "Свежий пост" in content, (
+        "После репликации пост должен появиться на главной странице."
+    )
+
+
+def test_author_sticks_to_primary_after_write(
+    replica, user_client, blend_post
+):
+    post = blend_post("Пост")
+    replicate()
+
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Мой комментарий"}
+    )
+    assert response.cookies["use_primary"].value == "1", (
+        "После изменяющего запроса пользователь должен получать cookie,"
+        " закрепляющую чтение за основной базой."
+    )
+    content = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert "Мой комментарий" in content, (
+        "Автор должен сразу видеть свой комментарий, даже если реплика"
+        " ещё не обновилась."
+    )
+
+
+def test_admin_reads_primary(replica, admin_client, blend_post):
+    replicate()
+    blend_post("Нереплицированный пост")
+    content = admin_client.get("/admin/blog/post/").content.decode()
+    assert "Нереплицированный пост" in content, (
+        "Админка должна работать с основной базой."
+    )
+
+
+def test_stale_replica_read_is_not_cached(
+    replica, user_client, another_user_client, blend_post
+):
+    post = blend_post("Старое название")
+    replicate()
+    post.title = "Новое название"
+    post.save()
+
+    content = user_client.get("/").content.decode()
+    assert "Старое название" in content
+
+    replicate()
+    content = another_user_client.get("/").content.decode()
+    assert "Новое название" in content, (
+        "Карточка, прочитанная из отставшей реплики, не должна попадать"
+        " в кеш фрагментов под новой версией поста."
+    )
+
+
+def test_cached_pages_are_rendered_from_primary(replica, client, blend_post):
+    post = blend_post("Старое название")
+    replicate()
+    post.title = "Новое название"
+    post.save()
+
+    for url in ("/", f"/posts/{post.id}/"):
+        content = client.get(url).content.decode()
+        assert "Новое название" in content, (
+            "Страница, которая попадёт в кеш, должна читаться из основной"
+            " базы, иначе устаревшая версия закешируется под новым ключом."
+        )
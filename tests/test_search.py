@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.search import build_match_query
+
+pytestmark = [pytest.mark.django_db]
+
+
+def found_titles(client, query: str) -> list:
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.title for post in response.context["page_obj"]]
+
+
+@pytest.fixture
+def blend_post(mixer: Mixer, user, published_category):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("category", published_category)
+        return mixer.blend("blog.Post", author=user, **kwargs)
+    return blend
+
+
+def test_match_query_quotes_terms():
+    assert build_match_query('Питон AND "NEAR(') == (
+        '"питон"* "and"* "near"*'
+    )
+    assert build_match_query("  ...  ") == ""
+
+
+def test_search_ranks_title_matches_first(user_client, blend_post):
+    blend_post(title="Заметки", text="Немного про питон и змей.")
+    blend_post(title="Питон для начинающих", text="Введение.")
+    blend_post(title="Про котов", text="Ничего общего.")
+
+    assert found_titles(user_client, "питон") == [
+        "Питон для начинающих", "Заметки"
+    ], "Совпадения в заголовке должны ранжироваться выше совпадений в тексте."
+    assert found_titles(user_client, "нач") == ["Питон для начинающих"], (
+        "Слова запроса должны искаться как префиксы."
+    )
+
+
+def test_search_respects_visibility(mixer: Mixer, user_client, blend_post):
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    blend_post(title="Видимый поиск")
+    blend_post(title="Скрытый поиск", is_published=False)
+    blend_post(title="Отложенный поиск",
+               pub_date=timezone.now() + timedelta(days=1))
+    blend_post(title="Поиск в скрытой категории",
+               category=hidden_category)
+
+    assert found_titles(user_client, "поиск") == ["Видимый поиск"]
+
+
+def test_index_follows_edits_and_deletes(user_client, blend_post):
+    post = blend_post(title="Первое название")
+
+    post.title = "Второе название"
+    post.save()
+    assert found_titles(user_client, "первое") == []
+    assert found_titles(user_client, "второе") == ["Второе название"]
+
+    post.delete()
+    assert found_titles(user_client, "второе") == []
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite",
+                    reason="FTS5 есть только на SQLite.")
+def test_rebuild_search_index(user_client, blend_post):
+    post = blend_post(title="Старое")
+    with connection.cursor() as cursor:
+        # Правка в обход триггеров, как при загрузке дампа.
+        cursor.execute("DROP TRIGGER blog_post_fts_update")
+    Post.objects.filter(pk=post.pk).update(title="Новое")
+    assert found_titles(user_client, "новое") == []
+
+    call_command("rebuild_search_index", optimize=True, stdout=StringIO())
+
+    assert found_titles(user_client, "новое") == ["Новое"]
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite",
+                    reason="FTS5 есть только на SQLite.")
+def test_search_is_driven_by_fts_index(user_client, blend_post):
+    blend_post(title="Индекс")
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        found_titles(user_client, "индекс")
+    sql, params = next(
+        statement for statement in statements
+        if "MATCH" in statement[0] and "COUNT(" not in statement[0])
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    assert any("VIRTUAL TABLE INDEX" in step for step in plan)
+    assert not any(step.startswith("SCAN blog_post ") or step == (
+        "SCAN blog_post") for step in plan), "\n".join(plan)
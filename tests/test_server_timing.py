@@ -0,0 +1,77 @@
+import json
+import logging
+import re
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+METRIC_RE = re.compile(r'(\w+)(?:;dur=([\d.]+))?(?:;desc="([^"]*)")?')
+
+
+def parse_server_timing(header: str) -> dict:
+    metrics = {}
+    for item in header.split(", "):
+        name, duration, description = METRIC_RE.fullmatch(item).groups()
+        metrics[name] = (
+            float(duration) if duration else None, description
+        )
+    return metrics
+
+
+def test_sampled_request_gets_breakdown(
+    settings, client, published_post, caplog
+):
+    settings.SERVER_TIMING_SAMPLE_RATE = 1
+    with caplog.at_level(logging.INFO, logger="blogicum.timing"):
+        response = client.get(f"/posts/{published_post.id}/")
+    metrics = parse_server_timing(response["Server-Timing"])
+    assert set(metrics) == {"db", "tpl", "total", "cache"}
+    db_ms, queries = metrics["db"]
+    assert int(queries.split()[0]) > 0, (
+        "Server-Timing должен учитывать SQL-запросы страницы."
+    )
+    assert metrics["tpl"][0] > 0, (
+        "Server-Timing должен учитывать время отрисовки шаблона."
+    )
+    assert metrics["total"][0] >= db_ms
+    assert metrics["cache"] == (None, "MISS")
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["view"] == "blog:post_detail"
+    assert record["status"] == 200
+    assert record["db_queries"] == int(queries.split()[0])
+
+
+def test_timing_record_emitted_with_project_logging(
+    settings, client, published_post, caplog
+):
+    settings.SERVER_TIMING_SAMPLE_RATE = 1
+    client.get("/")
+    records = [
+        record for record in caplog.records
+        if record.name == "blogicum.timing"
+    ]
+    assert records, (
+        "Настройка LOGGING должна пропускать записи blogicum.timing"
+        " уровня INFO."
+    )
+    assert json.loads(records[-1].getMessage())["view"] == "blog:index"
+    assert logging.getLogger("blogicum.timing").handlers
+
+
+def test_page_cache_hit_reported(settings, client, published_post):
+    settings.SERVER_TIMING_SAMPLE_RATE = 1
+    client.get(f"/posts/{published_post.id}/")
+    response = client.get(f"/posts/{published_post.id}/")
+    metrics = parse_server_timing(response["Server-Timing"])
+    assert metrics["cache"] == (None, "HIT")
+    assert metrics["tpl"][0] == 0, (
+        "Страница из кеша не должна отрисовывать шаблон."
+    )
+
+
+def test_unsampled_request_has_no_header(settings, client, published_post):
+    settings.SERVER_TIMING_SAMPLE_RATE = 0
+    response = client.get(f"/posts/{published_post.id}/")
+    assert not response.has_header("Server-Timing")
@@ -0,0 +1,95 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blogicum import middleware
+from blogicum.slow_queries import SlowQueryLog, fingerprint, normalize_sql
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def slow_log(settings, tmp_path, monkeypatch):
+    settings.SLOW_QUERY_LOG = str(tmp_path / "slow.jsonl")
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    monkeypatch.setattr(middleware, "slow_query_log", SlowQueryLog())
+    return tmp_path / "slow.jsonl"
+
+
+def read_log(path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_fingerprint_ignores_parameters():
+    assert normalize_sql(
+        'SELECT * FROM "blog_post" WHERE "id" IN (%s, %s) LIMIT 21'
+    ) == 'SELECT * FROM "blog_post" WHERE "id" IN (...) LIMIT ?'
+    assert fingerprint("SELECT 1 FROM t WHERE a = %s") == fingerprint(
+        "SELECT 1 FROM t WHERE a = 'x'"
+    )
+
+
+def test_slow_queries_logged_with_view_origin_and_plan(
+    slow_log, user_client, published_post
+):
+    user_client.get(f"/posts/{published_post.id}/")
+    user_client.get(f"/posts/{published_post.id}/")
+    entries = read_log(slow_log)
+
+    post_queries = [
+        entry for entry in entries
+        if entry.get("sql", "").startswith('SELECT "blog_post"')
+    ]
+    assert post_queries, "Запрос поста должен попасть в журнал."
+    first = post_queries[0]
+    assert first["view"] == "blog:post_detail"
+    assert first["origin"].startswith("blog/"), (
+        "В журнале должна быть строка кода проекта, выполнившая запрос."
+    )
+    assert first["plan"], "Для SELECT в журнал должен попадать план."
+    assert first["params"]
+
+    repeats = [
+        entry for entry in entries
+        if entry["fingerprint"] == first["fingerprint"]
+    ]
+    assert len(repeats) >= 2
+    assert all("sql" not in entry for entry in repeats[1:]), (
+        "Текст и план запроса должны записываться один раз на отпечаток."
+    )
+
+
+def test_admin_queries_logged(slow_log, admin_client, published_post):
+    admin_client.get("/admin/blog/post/")
+    views = {entry["view"] for entry in read_log(slow_log)}
+    assert "admin:blog_post_changelist" in views
+
+
+def test_fast_queries_not_logged(settings, slow_log, client, published_post):
+    settings.SLOW_QUERY_THRESHOLD_MS = 60_000
+    client.get(f"/posts/{published_post.id}/")
+    assert not slow_log.exists()
+
+
+def test_report_ranks_by_total_time(tmp_path):
+    log = tmp_path / "slow.jsonl"
+    entries = [
+        {"fingerprint": "aaa", "duration_ms": 150, "view": "blog:index",
+         "origin": "blog/views.py:1 in a", "sql": "SELECT a", "plan": None},
+        {"fingerprint": "bbb", "duration_ms": 400, "view": "admin:x",
+         "origin": "blog/admin.py:2 in b", "sql": "SELECT b",
+         "plan": ["SCAN blog_post"]},
+        {"fingerprint": "aaa", "duration_ms": 300, "view": "blog:index",
+         "origin": "blog/views.py:1 in a"},
+    ]
+    log.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    out = StringIO()
+    call_command("slow_query_report", log=str(log), stdout=out)
+    report = out.getvalue()
+    assert report.index("aaa") < report.index("bbb"), (
+        "Отчёт должен упорядочивать запросы по суммарному времени."
+    )
+    assert "2 раз, всего 450 мс" in report
+    assert "План: SCAN blog_post" in report
@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from blog.db import pragma_statements
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Настройки PRAGMA применяются только к SQLite.",
+    ),
+]
+
+
+def read_pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    settings_dict = {
+        **connection.settings_dict,
+        "NAME": str(tmp_path / "pragmas.sqlite3"),
+    }
+    wrapper = DatabaseWrapper(settings_dict, alias="pragmas")
+    yield wrapper
+    wrapper.close()
+
+
+def test_production_profile_applied_to_new_connections(
+    settings, file_connection
+):
+    settings.SQLITE_PRAGMAS = settings.SQLITE_PRODUCTION_PRAGMAS
+    assert read_pragma(file_connection, "journal_mode") == "wal", (
+        "Профиль production должен переводить базу в режим WAL."
+    )
+    assert read_pragma(file_connection, "synchronous") == 1, (
+        "В профиле production должен действовать synchronous=NORMAL."
+    )
+    assert read_pragma(file_connection, "busy_timeout") == 5000
+    assert read_pragma(file_connection, "temp_store") == 2
+
+
+def test_stock_profile_keeps_sqlite_defaults(settings, file_connection):
+    settings.SQLITE_PRAGMAS = {}
+    assert read_pragma(file_connection, "journal_mode") == "delete", (
+        "Без профиля production настройки SQLite меняться не должны."
+    )
+
+
+@pytest.mark.parametrize(
+    "pragmas",
+    [
+        {"journal_mode": "wal; DROP TABLE blog_post"},
+        {"locking_mode": "exclusive"},
+        {"cache_size": "-1 OR 1"},
+    ],
+)
+def test_invalid_pragmas_rejected(pragmas):
+    with pytest.raises(ImproperlyConfigured):
+        pragma_statements(pragmas)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_db_reports_both_profiles():
+    out = StringIO()
+    call_command(
+        "bench_db", seconds=0.2, posts=20, readers=2, writers=1, stdout=out
+    )
+    report = out.getvalue()
+    assert "stock" in report and "production" in report, (
+        "Команда bench_db должна сравнивать оба профиля."
+    )
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT = b"same bytes"
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_old(name):
+    old = time.time() - 3 * 24 * 3600
+    os.utime(default_storage.path(name), (old, old))
+
+
+def test_files_are_named_by_content_hash(media_root):
+    first = default_storage.save("post_images/a.JPG", ContentFile(CONTENT))
+    second = default_storage.save("post_images/b.jpg", ContentFile(CONTENT))
+
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    assert first == second == f"post_images/{digest}.jpg", (
+        "Одинаковые загрузки должны храниться одним файлом с именем по"
+        " хешу содержимого."
+    )
+    assert os.listdir(media_root / "post_images") == [f"{digest}.jpg"]
+
+
+def test_gc_removes_only_unreferenced_files(
+        mixer: Mixer, user, published_category
+):
+    shared = default_storage.save("post_images/x.jpg", ContentFile(CONTENT))
+    orphan = default_storage.save("post_images/y.jpg",
+                                  ContentFile(b"orphan"))
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category, image=shared
+    )
+    fresh = default_storage.save("post_images/z.jpg", ContentFile(b"fresh"))
+    for name in (shared, orphan):
+        make_old(name)
+    posts[0].delete()
+
+    call_command("gc_media", dry_run=True, stdout=StringIO())
+    assert default_storage.exists(orphan)
+
+    call_command("gc_media", stdout=StringIO())
+    assert not default_storage.exists(orphan)
+    assert default_storage.exists(shared), (
+        "Файл, на который ещё ссылается пост, удалять нельзя."
+    )
+    assert default_storage.exists(fresh), (
+        "Недавно загруженные файлы не должны удаляться."
+    )
+
+    posts[1].delete()
+    call_command("gc_media", stdout=StringIO())
+    assert not default_storage.exists(shared)
+
+
+def test_reused_orphan_is_protected_by_grace_period():
+    orphan = default_storage.save("post_images/old.jpg", ContentFile(CONTENT))
+    make_old(orphan)
+    # Новая загрузка с тем же содержимым; пост ещё не сохранён.
+    assert default_storage.save(
+        "post_images/new.jpg", ContentFile(CONTENT)) == orphan
+
+    call_command("gc_media", stdout=StringIO())
+    assert default_storage.exists(orphan), (
+        "Файл, на который только что сослалась новая загрузка, не должен"
+        " удаляться до истечения отсрочки gc_media."
+    )